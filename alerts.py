@@ -0,0 +1,185 @@
+# alerts.py
+# Alarmas y notificaciones: un único hilo despachador con cooldown/agrupado y sinks asíncronos por lotes
+import json
+import time
+import queue
+import threading
+import subprocess
+import urllib.request
+
+from utils import play_sound_nonblocking
+
+class Sink:
+    """Destino de notificaciones. Las subclases implementan send(batch) con una lista de eventos (dicts).
+    Cada sink tiene su propio hilo y cola: un sink lento solo se retrasa a sí mismo."""
+    def __init__(self, batch_size=20, batch_interval=2.0, max_pending=1000):
+        self.batch_size = int(batch_size)
+        self.batch_interval = float(batch_interval)
+        self.dropped = 0
+        self.sent = 0
+        self._q = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def send(self, batch):
+        raise NotImplementedError
+
+    def put(self, event):
+        try:
+            self._q.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while not (self._stop.is_set() and self._q.empty()):
+            try:
+                batch = [self._q.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            # agrupar lo que llegue durante batch_interval (o hasta batch_size)
+            end = time.time() + self.batch_interval
+            while len(batch) < self.batch_size:
+                remaining = end - time.time()
+                if remaining <= 0 or self._stop.is_set():
+                    break
+                try:
+                    batch.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self.send(batch)
+                self.sent += len(batch)
+            except Exception as e:
+                print(f"[alerts] {type(self).__name__} error:", e)
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+class WebhookSink(Sink):
+    """POST JSON {"events": [...]} a una URL (p.ej. un servidor local)."""
+    def __init__(self, url, timeout=5.0, **kw):
+        self.url = url
+        self.timeout = timeout
+        super().__init__(**kw)
+
+    def send(self, batch):
+        body = json.dumps({"events": batch}).encode("utf-8")
+        req = urllib.request.Request(self.url, data=body, method="POST",
+                                     headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+
+class CommandSink(Sink):
+    """Ejecuta un comando por lote y le pasa el JSON del lote por stdin."""
+    def __init__(self, cmd, timeout=10.0, **kw):
+        self.cmd = cmd
+        self.timeout = timeout
+        super().__init__(**kw)
+
+    def send(self, batch):
+        subprocess.run(self.cmd, input=json.dumps({"events": batch}).encode("utf-8"),
+                       timeout=self.timeout, check=False,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class AlertDispatcher:
+    """
+    Recibe eventos desde el bucle de frames (notify() nunca bloquea) y en un único hilo:
+      - reproduce el sonido de alarma (precargado) como mucho una vez cada sound_cooldown s,
+      - reenvía a los sinks como mucho un evento por tipo cada notify_cooldown s; los eventos
+        que llegan dentro del cooldown se agrupan y salen juntos (count, first_ts, last_ts)
+        cuando vence.
+    Uso:
+        alerts = AlertDispatcher(cfg.SONIDO_ALARMA, sinks=[WebhookSink(url)])
+        alerts.notify('intrusion', sound=True, file=path)
+    """
+    def __init__(self, sound_path=None, sinks=None, sound_cooldown=1.0, notify_cooldown=30.0):
+        self.sound_path = sound_path
+        self.sinks = list(sinks or [])
+        self.sound_cooldown = float(sound_cooldown)
+        self.notify_cooldown = float(notify_cooldown)
+
+        self._q = queue.Queue(maxsize=256)
+        self._last_sound = 0.0
+        self._last_sent = {}   # kind -> hora del último envío
+        self._pending = {}     # kind -> evento agrupado a la espera de que venza el cooldown
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="alerts", daemon=True)
+        self._thread.start()
+
+    def notify(self, kind, sound=False, **data):
+        event = {"kind": kind, "ts": time.time()}
+        event.update(data)
+        try:
+            self._q.put_nowait((event, sound))
+        except queue.Full:
+            pass  # el bucle de frames nunca espera por las alertas
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                event, sound = self._q.get(timeout=self._next_timeout())
+            except queue.Empty:
+                event = None
+            now = time.time()
+            if event is not None:
+                if sound and self.sound_path and now - self._last_sound >= self.sound_cooldown:
+                    self._last_sound = now
+                    play_sound_nonblocking(self.sound_path)
+                self._coalesce(event)
+            self._flush_due(now)
+        self._flush_due(float("inf"))  # enviar lo pendiente al parar
+
+    def _coalesce(self, event):
+        kind = event["kind"]
+        pend = self._pending.get(kind)
+        if pend is None:
+            event["count"] = 1
+            event["first_ts"] = event["ts"]
+            event["last_ts"] = event["ts"]
+            self._pending[kind] = event
+        else:
+            # se conservan los datos del último evento y se acumula el recuento
+            count, first_ts = pend["count"] + 1, pend["first_ts"]
+            pend.clear()
+            pend.update(event)
+            pend["count"] = count
+            pend["first_ts"] = first_ts
+            pend["last_ts"] = event["ts"]
+
+    def _flush_due(self, now):
+        for kind in list(self._pending):
+            if now - self._last_sent.get(kind, 0.0) >= self.notify_cooldown:
+                event = self._pending.pop(kind)
+                self._last_sent[kind] = min(now, time.time())
+                for sink in self.sinks:
+                    sink.put(event)
+
+    def _next_timeout(self):
+        # despertar cuando venza el cooldown del primer evento agrupado
+        if not self._pending:
+            return 0.5
+        now = time.time()
+        due = min(self._last_sent.get(k, 0.0) + self.notify_cooldown for k in self._pending)
+        return min(0.5, max(0.01, due - now))
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        self._thread.join(timeout)
+        for sink in self.sinks:
+            sink.stop(timeout)
+
+
+def build_sinks(cfg):
+    """Crea los sinks configurados en config.py."""
+    sinks = []
+    kw = dict(batch_size=cfg.NOTIFY_BATCH_SIZE, batch_interval=cfg.NOTIFY_BATCH_INTERVAL)
+    if cfg.NOTIFY_WEBHOOK_URL:
+        sinks.append(WebhookSink(cfg.NOTIFY_WEBHOOK_URL, **kw))
+    if cfg.NOTIFY_COMMAND:
+        sinks.append(CommandSink(cfg.NOTIFY_COMMAND, **kw))
+    return sinks
@@ -0,0 +1,118 @@
+# background.py
+# Arranque en caliente del modelo de fondo (MOG2): instantánea periódica del fondo aprendido en disco
+# y calentamiento acelerado sobre frames en buffer antes de armar las alarmas
+import os
+import time
+import threading
+import numpy as np
+import cv2
+
+class WarmStartSubtractor:
+    """
+    Envuelve un BackgroundSubtractorMOG2 con el mismo apply(), así que se pasa tal cual a
+    detect_motion_and_update.
+    El estado interno de MOG2 no se puede serializar; en su lugar se guarda cada
+    snapshot_every segundos la imagen de fondo aprendida (getBackgroundImage). Al arrancar,
+    o si cambia el tamaño de entrada (p.ej. al editar zonas), se acumulan warmup_frames frames
+    devolviendo máscaras vacías (alarmas desarmadas) y después se entrena de golpe: primero
+    con la instantánea guardada (con ruido, para que la varianza no quede a cero) y luego con
+    los frames del buffer a tasa de aprendizaje alta. Tras eso `ready` pasa a True.
+    Uso:
+        backSub = WarmStartSubtractor(cv2.createBackgroundSubtractorMOG2(...), "Fondo/cam0")
+    """
+    def __init__(self, backSub, path_prefix, warmup_frames=20, passes=3,
+                 seed_frames=10, seed_noise=4.0, snapshot_every=300.0):
+        self.backSub = backSub
+        self.path_prefix = path_prefix
+        self.warmup_frames = int(warmup_frames)
+        self.passes = int(passes)
+        self.seed_frames = int(seed_frames)
+        self.seed_noise = float(seed_noise)
+        self.snapshot_every = float(snapshot_every)
+
+        self.ready = False
+        self._shape = None
+        self._buffer = []
+        self._last_snapshot = time.time()
+        self._rng = np.random.default_rng()
+
+    def _path(self, shape):
+        # una instantánea por tamaño de entrada (resolución de análisis / recorte de zonas)
+        return f"{self.path_prefix}_{shape[1]}x{shape[0]}.png"
+
+    # ---------- interfaz de BackgroundSubtractor ----------
+    def apply(self, image, learningRate=-1):
+        if image.shape != self._shape:
+            # primer frame o cambio de tamaño: MOG2 empezaría de cero -> recalentar
+            self._shape = image.shape
+            self._buffer = []
+            self.ready = False
+        if not self.ready:
+            self._buffer.append(image.copy())
+            if len(self._buffer) >= self.warmup_frames:
+                self._warm_up()
+            return np.zeros(image.shape[:2], dtype=np.uint8)
+
+        mask = self.backSub.apply(image, learningRate=learningRate)
+        if self.snapshot_every > 0 and time.time() - self._last_snapshot >= self.snapshot_every:
+            self.snapshot(background=True)
+        return mask
+
+    def getBackgroundImage(self):
+        return self.backSub.getBackgroundImage()
+
+    # ---------- calentamiento ----------
+    def _warm_up(self):
+        t0 = time.perf_counter()
+        seeded = False
+        path = self._path(self._shape)
+        bg = cv2.imread(path) if os.path.exists(path) else None
+        if bg is not None and bg.shape == self._shape:
+            # lr=1 reinicia el modelo con el fondo guardado; las copias con ruido fijan una varianza realista
+            self.backSub.apply(bg, learningRate=1.0)
+            for _ in range(self.seed_frames):
+                noise = self._rng.normal(0, self.seed_noise, bg.shape)
+                self.backSub.apply(np.clip(bg + noise, 0, 255).astype(np.uint8), learningRate=0.2)
+            seeded = True
+        else:
+            self.backSub.apply(self._buffer[0], learningRate=1.0)
+
+        # varias pasadas sobre el buffer con tasa decreciente (converge en frames, no en 'history')
+        n = 0
+        for _ in range(self.passes):
+            for f in self._buffer:
+                n += 1
+                self.backSub.apply(f, learningRate=max(0.02, 1.0 / (n + 1)))
+        self._buffer = []
+        self.ready = True
+        print(f"[background] Modelo de fondo listo en {(time.perf_counter() - t0)*1000:.0f} ms "
+              f"({'con' if seeded else 'sin'} instantánea previa)")
+
+    # ---------- instantánea ----------
+    def snapshot(self, background=False):
+        """Guarda el fondo aprendido. Llamar desde el hilo que usa apply() (MOG2 no es thread-safe);
+        con background=True solo la escritura a disco va a otro hilo."""
+        self._last_snapshot = time.time()
+        if not self.ready:
+            return
+        try:
+            bg = self.backSub.getBackgroundImage()
+        except cv2.error:
+            return
+        if bg is None:
+            return
+        path = self._path(self._shape)
+
+        def _write():
+            # escribir a un temporal y renombrar: nunca queda una instantánea a medias
+            tmp = path + ".tmp.png"
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if cv2.imwrite(tmp, bg):
+                    os.replace(tmp, path)
+            except Exception as e:
+                print("[background] Error guardando instantánea:", e)
+        if background:
+            threading.Thread(target=_write, daemon=True).start()
+        else:
+            _write()
@@ -6,14 +6,61 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 EVID_DIR = os.path.join(BASE_DIR, "Evidencias") # carpeta para videos e imágenes capturados que se crea automáticamente
 ALARM_DIR = os.path.join(BASE_DIR, "Alarmas") # carpeta para sonidos de alarma
+BG_DIR = os.path.join(BASE_DIR, "Fondo") # instantáneas del modelo de fondo (arranque en caliente)
 os.makedirs(EVID_DIR, exist_ok=True)
 os.makedirs(ALARM_DIR, exist_ok=True)
+os.makedirs(BG_DIR, exist_ok=True)
 
 # Ajustes
 TIMELAPSE = 1.0          # segundos entre fotos cuando hay movimiento
 MIN_AREA = 2000          # área mínima para considerar movimiento
 SONIDO_ALARMA = os.path.join(ALARM_DIR, 'alarma_suave.wav')  # ajustar para cambiar de archivo
 VIDEO_DURATION = 6       # segundos posteriores a la detección (auto-record)
-FRAME_BUFFER_SIZE = 60   # frames previos para buffer
+PREROLL_SECONDS = 25     # segundos máximos de buffer previo (pre-roll) que se añaden a cada grabación
+# memoria máxima del pre-roll (frames en JPEG). Manda sobre PREROLL_SECONDS si se llena antes (se avisa por consola):
+# 48 MB dan ~25 s a 640x480 @ 20 fps (~40 KB/frame), pero a 1080p (~250 KB/frame) hacen falta ~128 MB
+PREROLL_MAX_BYTES = 48 * 1024 * 1024
+PREROLL_JPEG_QUALITY = 80             # calidad JPEG del pre-roll
+RECORD_QUEUE_MAX_BYTES = 256 * 1024 * 1024  # memoria máxima de frames sin comprimir pendientes de grabar (flujo simple; en flujo doble se graba desde el pre-roll comprimido)
 FPS_FALLBACK = 20        # FPS por defecto si no se puede obtener de la cámara
-UMBRAL_LUZ = 40          # umbral de luminosidad para activar visión nocturna
\ No newline at end of file
+UMBRAL_LUZ = 40          # umbral de luminosidad para activar visión nocturna
+BG_WARMUP_FRAMES = 20    # frames en buffer para calentar el modelo de fondo antes de armar las alarmas
+BG_SNAPSHOT_EVERY = 300  # segundos entre instantáneas del fondo aprendido (0 = solo al cerrar)
+HEATMAP_DECAY = 0.998    # atenuación por frame del mapa de calor de actividad (más cerca de 1 = más memoria)
+
+# Cámara y zonas de detección
+CAMERA_INDEX = 0         # índice de cv2.VideoCapture (también identifica las zonas guardadas)
+CAMERA_WIDTH = 0         # resolución pedida a la cámara (0 = la del driver), p.ej. 1920x1080
+CAMERA_HEIGHT = 0
+CAMERA_FPS = 0           # FPS pedidos a la cámara (0 = los del driver)
+CAMERA_FOURCC = ''       # formato de captura, p.ej. 'MJPG' (necesario en muchas webcams USB para 1080p a 30 fps)
+CAMERA_BUFFERSIZE = 1    # CAP_PROP_BUFFERSIZE: frames en cola del driver (1 = menor latencia, 0 = no tocar)
+ANALYSIS_WIDTH = 0       # >0 activa el flujo doble: análisis y pantalla a este ancho, grabación a resolución completa
+ZONES_FILE = os.path.join(BASE_DIR, "zonas.json")  # polígonos de inclusión/exclusión por cámara
+
+# Grabación
+RECORD_CODEC = 'XVID'    # 'MJPG' = poca CPU (ficheros grandes), 'XVID' = ficheros pequeños (más CPU)
+RECORD_MODE = 'thread'   # 'thread' = codificar en hilos de la GUI, 'process' = proceso hijo + memoria compartida
+ENCODER_RING_SLOTS = 32  # huecos del anillo de frames compartido con el proceso de codificación
+
+# Alarma y notificaciones
+ALARM_COOLDOWN = 1.0         # segundos mínimos entre sonidos de alarma
+NOTIFY_COOLDOWN = 30.0       # segundos mínimos entre notificaciones del mismo tipo (las intermedias se agrupan)
+NOTIFY_WEBHOOK_URL = None    # p.ej. "http://127.0.0.1:8000/alerta" (POST JSON con los eventos)
+NOTIFY_COMMAND = None        # p.ej. ["/usr/local/bin/aviso.sh"] (recibe el JSON de los eventos por stdin)
+NOTIFY_BATCH_SIZE = 20       # eventos máximos por envío
+NOTIFY_BATCH_INTERVAL = 2.0  # segundos que un sink espera para agrupar eventos en un lote
+
+# Caras
+FACE_TRACK_IOU = 0.3       # solape mínimo para considerar que una cara sigue en la misma pista
+FACE_TRACK_TTL = 1.5       # segundos sin ver una cara antes de cerrar su pista
+FACE_SAVE_INTERVAL = 10.0  # segundos entre mejores tomas guardadas de una misma pista
+FACE_HASH_DIST = 6         # distancia de Hamming (dHash) por debajo de la cual un recorte se considera repetido
+
+# Vista remota (MJPEG por HTTP)
+STREAM_ENABLED = False       # servidor en http://STREAM_HOST:STREAM_PORT/ (/stream.mjpg, /snapshot.jpg)
+STREAM_HOST = "127.0.0.1"    # "0.0.0.0" para aceptar conexiones de la red local
+STREAM_PORT = 8080
+STREAM_QUALITY = 75          # calidad JPEG
+STREAM_MAX_FPS = 10          # frames codificados por segundo como máximo (para todos los clientes)
+STREAM_WIDTHS = (640, 320)   # anchos que se pueden pedir con ?w= (además del original)
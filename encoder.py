@@ -0,0 +1,256 @@
+# encoder.py
+# Codificación de vídeo en un proceso hijo alimentado por un anillo de frames en memoria compartida
+import os
+import time
+import queue
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+import cv2
+
+def _write_slot(job, ring, slot, shape):
+    # la vista sobre el anillo solo vive dentro de esta función: si sobreviviera,
+    # shm.close() fallaría al parar con BufferError (exported pointers exist)
+    frame = ring[slot, :int(np.prod(shape))].reshape(shape)
+    t = time.perf_counter()
+    job['writer'].write(frame)
+    job['encode_s'] += time.perf_counter() - t
+    job['frames'] += 1
+
+def _encoder_main(shm_name, slots, slot_bytes, cmd_q, free_q, result_q):
+    """Bucle del proceso hijo: abre writers, codifica los frames del anillo y devuelve estadísticas."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray((slots, slot_bytes), dtype=np.uint8, buffer=shm.buf)
+    jobs = {}  # job_id -> dict(writer, path, frames, encode_s, t0)
+    try:
+        while True:
+            msg = cmd_q.get()
+            op = msg[0]
+            if op == 'frame':
+                _, job_id, slot, shape = msg
+                job = jobs.get(job_id)
+                if job is not None:
+                    _write_slot(job, ring, slot, shape)
+                free_q.put(slot)  # devolver el hueco al padre
+            elif op == 'open':
+                _, job_id, path, codec, fps, (w, h) = msg
+                writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), fps, (w, h))
+                if not writer.isOpened():
+                    result_q.put(('error', job_id, {'path': path, 'error': f"No se pudo abrir el writer ({codec})"}))
+                    continue
+                jobs[job_id] = {'writer': writer, 'path': path, 'codec': codec,
+                                'frames': 0, 'encode_s': 0.0, 't0': time.time()}
+            elif op == 'close':
+                _, job_id = msg
+                job = jobs.pop(job_id, None)
+                if job is None:
+                    result_q.put(('done', job_id, None))
+                    continue
+                job['writer'].release()
+                path = job['path']
+                stats = {
+                    'path': path,
+                    'codec': job['codec'],
+                    'frames': job['frames'],
+                    'seconds': time.time() - job['t0'],
+                    'encode_s': job['encode_s'],
+                    'bytes': os.path.getsize(path) if os.path.exists(path) else 0,
+                }
+                result_q.put(('done', job_id, stats))
+            elif op == 'stop':
+                break
+    finally:
+        for job in jobs.values():
+            try:
+                job['writer'].release()
+            except Exception:
+                pass
+        del ring
+        shm.close()
+
+
+class ProcessWriter:
+    """Sustituto de cv2.VideoWriter (write/release/isOpened) que envía los frames al EncoderProcess."""
+    def __init__(self, encoder, job_id, path, frame_shape):
+        self.encoder = encoder
+        self.job_id = job_id
+        self.path = path
+        self.frame_shape = tuple(frame_shape)
+        self.dropped = 0
+        self.stats = None
+        self._open = True
+
+    def isOpened(self):
+        # False también si el hijo no pudo abrir el fichero (codec no disponible): llega como 'error'
+        return self._open and not self.encoder.job_failed(self.job_id)
+
+    def write(self, frame):
+        """Devuelve True si el frame entra en el anillo, False si se descarta (o el writer falló)."""
+        if not self.isOpened():
+            return False
+        if not self.encoder.submit(self.job_id, frame):
+            self.dropped += 1
+            return False
+        return True
+
+    def release(self):
+        if not self._open:
+            return
+        self._open = False
+        self.stats = self.encoder.close_job(self.job_id)
+        if self.stats is not None:
+            self.stats['dropped'] = self.dropped
+            print("[encoder] {path}: {frames} frames ({codec}), codificación {encode_s:.2f}s, "
+                  "{bytes} bytes, descartados {dropped}".format(**self.stats))
+
+
+class EncoderProcess:
+    """
+    Proceso hijo de codificación compartido por todas las grabaciones.
+    Los frames se copian a un anillo de `slots` huecos en memoria compartida y solo viaja por la
+    cola el índice del hueco, así el GIL del proceso de la GUI no paga la compresión.
+    El anillo se dimensiona con el primer frame recibido (la resolución no cambia en una sesión).
+    Uso:
+        enc = EncoderProcess(slots=32)
+        w = enc.open_writer(path, 'MJPG', fps, frame.shape)
+        w.write(frame); w.release()
+        enc.stop()
+    """
+    def __init__(self, slots=32, submit_timeout=0.5):
+        self.slots = int(slots)
+        self.submit_timeout = submit_timeout
+        self.slot_bytes = 0
+
+        self._ctx = mp.get_context('spawn')  # no heredar el estado de Tk/cámara con fork
+        self._proc = None
+        self._shm = None
+        self._ring = None
+        self._cmd_q = None
+        self._free_q = None
+        self._result_q = None
+
+        self._lock = threading.Lock()
+        self._next_job = 0
+        self._results = {}
+        self._failed = set()  # trabajos cuyo writer no se pudo abrir en el hijo
+        self._results_cv = threading.Condition()
+        self._listener = None
+
+    def _ensure_started(self, slot_bytes):
+        with self._lock:
+            if self._proc is not None and self._proc.is_alive():
+                return True
+            if self._shm is not None:
+                # el hijo murió: liberar el anillo anterior antes de relanzar
+                self._release_ring()
+            self.slot_bytes = int(slot_bytes)
+            self._shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+            self._ring = np.ndarray((self.slots, self.slot_bytes), dtype=np.uint8, buffer=self._shm.buf)
+            self._cmd_q = self._ctx.Queue()
+            self._free_q = self._ctx.Queue()
+            self._result_q = self._ctx.Queue()
+            for i in range(self.slots):
+                self._free_q.put(i)
+            self._proc = self._ctx.Process(target=_encoder_main, name="encoder",
+                                           args=(self._shm.name, self.slots, self.slot_bytes,
+                                                 self._cmd_q, self._free_q, self._result_q),
+                                           daemon=True)
+            self._proc.start()
+            self._listener = threading.Thread(target=self._listen_results, daemon=True)
+            self._listener.start()
+            print(f"[encoder] Proceso de codificación iniciado (pid {self._proc.pid}, {self.slots} huecos)")
+            return True
+
+    def _listen_results(self):
+        """Recoge en el padre las rutas y estadísticas que informa el hijo."""
+        result_q = self._result_q
+        while True:
+            try:
+                kind, job_id, info = result_q.get()
+            except (EOFError, OSError, ValueError):
+                return
+            if kind == 'stop':
+                return
+            if kind == 'error':
+                # el 'close' posterior del mismo trabajo llegará como 'done' sin estadísticas
+                print("[encoder] Error:", info.get('error'), info.get('path'))
+                with self._results_cv:
+                    self._failed.add(job_id)
+                continue
+            with self._results_cv:
+                self._results[job_id] = info
+                self._results_cv.notify_all()
+
+    def open_writer(self, path, codec, fps, frame_shape):
+        h, w = frame_shape[:2]
+        nbytes = int(np.prod(frame_shape))
+        self._ensure_started(nbytes)
+        with self._lock:
+            job_id = self._next_job
+            self._next_job += 1
+        self._cmd_q.put(('open', job_id, path, codec, max(1, int(fps)), (w, h)))
+        return ProcessWriter(self, job_id, path, frame_shape)
+
+    def job_failed(self, job_id):
+        """True si el hijo informó de que no pudo abrir el writer de ese trabajo."""
+        with self._results_cv:
+            return job_id in self._failed
+
+    def submit(self, job_id, frame):
+        """Copia el frame a un hueco libre del anillo. Devuelve False si se descarta."""
+        if self._proc is None or not self._proc.is_alive():
+            return False
+        if frame.nbytes > self.slot_bytes:
+            return False
+        try:
+            slot = self._free_q.get(timeout=self.submit_timeout)
+        except queue.Empty:
+            return False  # hijo saturado: descartar antes que bloquear la grabación
+        self._ring[slot, :frame.nbytes] = np.ascontiguousarray(frame).reshape(-1)
+        self._cmd_q.put(('frame', job_id, slot, frame.shape))
+        return True
+
+    def close_job(self, job_id, timeout=10.0):
+        """Cierra el fichero del trabajo y espera (hasta timeout) sus estadísticas."""
+        if self._proc is None or not self._proc.is_alive():
+            return None
+        self._cmd_q.put(('close', job_id))
+        end = time.time() + timeout
+        with self._results_cv:
+            while job_id not in self._results:
+                remaining = end - time.time()
+                if remaining <= 0:
+                    return None
+                self._results_cv.wait(remaining)
+            self._failed.discard(job_id)
+            return self._results.pop(job_id)
+
+    def stop(self, timeout=5.0):
+        """Para el proceso hijo (tras vaciar lo pendiente) y libera la memoria compartida."""
+        with self._lock:
+            proc = self._proc
+            self._proc = None
+        if proc is None:
+            return
+        try:
+            self._cmd_q.put(('stop',))
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+        except Exception as e:
+            print("[encoder] Error al parar:", e)
+        try:
+            self._result_q.put(('stop', None, None))
+        except Exception:
+            pass
+        self._release_ring()
+
+    def _release_ring(self):
+        self._ring = None
+        try:
+            self._shm.close()
+            self._shm.unlink()
+        except Exception:
+            pass
+        self._shm = None
@@ -0,0 +1,158 @@
+# faces.py
+# Seguimiento de caras por IoU/posición y guardado de la mejor toma por pista (nitidez + tamaño) con dedupe por hash perceptual
+import os
+import time
+import itertools
+from collections import deque
+import cv2
+
+from utils import timestamp
+
+def _iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+def _center_dist(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    dx = (ax + aw / 2) - (bx + bw / 2)
+    dy = (ay + ah / 2) - (by + bh / 2)
+    return (dx * dx + dy * dy) ** 0.5
+
+def dhash(gray, size=8):
+    """Hash perceptual por diferencias (64 bits para size=8)."""
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    h = 0
+    for b in bits:
+        h = (h << 1) | int(b)
+    return h
+
+def sharpness_score(gray):
+    """Varianza del laplaciano (nitidez) ponderada por el lado de la cara (tamaño)."""
+    lap_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+    return lap_var * (gray.shape[0] * gray.shape[1]) ** 0.5
+
+
+class _Track:
+    def __init__(self, track_id, bbox, now):
+        self.id = track_id
+        self.bbox = bbox
+        self.last_seen = now
+        self.interval_start = now
+        self.best_score = -1.0
+        self.best_crop = None
+        self.best_gray = None
+
+
+class FaceTracker:
+    """
+    Agrupa las detecciones de caras en pistas de vida corta (IoU o cercanía del centro) y,
+    en lugar de guardar un recorte por cara y frame, guarda solo el mejor recorte de cada
+    pista por intervalo (o al perderse la pista). Los recortes casi iguales a uno ya
+    guardado (distancia de Hamming del dHash) se descartan.
+    Uso:
+        tracker = FaceTracker(cfg.EVID_DIR)
+        saved = tracker.update(frame, caras)   # rutas guardadas en este frame
+        tracker.flush()                        # al cerrar
+    """
+    def __init__(self, save_dir, iou_thr=0.3, ttl=1.5, interval=10.0, hash_dist=6, recent_hashes=64):
+        self.save_dir = save_dir
+        self.iou_thr = iou_thr
+        self.ttl = ttl
+        self.interval = interval
+        self.hash_dist = hash_dist
+
+        self.tracks = []
+        self._ids = itertools.count(1)
+        self._recent = deque(maxlen=recent_hashes)  # hashes de los últimos recortes guardados
+        self.saved = 0
+        self.skipped_dupes = 0
+
+    def _match(self, bbox):
+        best, best_iou = None, self.iou_thr
+        for t in self.tracks:
+            iou = _iou(bbox, t.bbox)
+            if iou >= best_iou:
+                best, best_iou = t, iou
+        if best is None:
+            # sin solape suficiente: aceptar si el centro se ha movido menos de medio ancho
+            for t in self.tracks:
+                if _center_dist(bbox, t.bbox) < 0.5 * max(bbox[2], t.bbox[2]):
+                    return t
+        return best
+
+    def update(self, frame, caras, now=None):
+        now = time.time() if now is None else now
+        saved = []
+        used = set()
+        for bbox in caras:
+            x, y, w, h = bbox
+            t = self._match(bbox)
+            if t is None or t.id in used:
+                t = _Track(next(self._ids), bbox, now)
+                self.tracks.append(t)
+            used.add(t.id)
+            t.bbox = bbox
+            t.last_seen = now
+
+            crop = frame[y:y+h, x:x+w]
+            if crop.size == 0:
+                continue
+            gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+            score = sharpness_score(gray)
+            if score > t.best_score:
+                t.best_score = score
+                t.best_crop = crop.copy()
+                t.best_gray = gray
+
+        alive = []
+        for t in self.tracks:
+            if now - t.last_seen > self.ttl:
+                # pista perdida: guardar su mejor toma pendiente
+                path = self._save_best(t)
+                if path:
+                    saved.append(path)
+                continue
+            if now - t.interval_start >= self.interval:
+                path = self._save_best(t)
+                if path:
+                    saved.append(path)
+                t.interval_start = now
+            alive.append(t)
+        self.tracks = alive
+        return saved
+
+    def _save_best(self, t):
+        crop, gray = t.best_crop, t.best_gray
+        t.best_crop = None
+        t.best_gray = None
+        t.best_score = -1.0
+        if crop is None:
+            return None
+        h = dhash(gray)
+        if any(bin(h ^ r).count("1") <= self.hash_dist for r in self._recent):
+            self.skipped_dupes += 1
+            return None
+        self._recent.append(h)
+        # id de pista en el nombre: el timestamp solo llega a segundos
+        path = os.path.join(self.save_dir, f"cara_{timestamp()}_t{t.id}.jpg")
+        n = 1
+        while os.path.exists(path):
+            path = os.path.join(self.save_dir, f"cara_{timestamp()}_t{t.id}_{n}.jpg")
+            n += 1
+        cv2.imwrite(path, crop)
+        self.saved += 1
+        return path
+
+    def flush(self):
+        """Guarda las mejores tomas pendientes de todas las pistas (al cerrar la aplicación).
+        No es seguro en paralelo con update(): llamarlo desde el mismo hilo que el bucle de frames."""
+        saved = [p for p in (self._save_best(t) for t in self.tracks) if p]
+        self.tracks = []
+        return saved
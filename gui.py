@@ -1,33 +1,60 @@
 # gui.py 
 # GUI modular: crea la ventana, sliders, botones, lista de evidencias, el reproductor con barra de progreso y el reproductor de Media
 import threading
+from collections import deque
 import tkinter as tk
 from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
 import cv2
+import numpy as np
 import time
 import os
 
-from utils import list_evid_files, play_sound_nonblocking, timestamp
-from processor import apply_hsv_adjust, aplicar_vision_nocturna_verde, aplicar_vision_termica, calcular_luminosidad, detect_motion_and_update
+from utils import list_evid_files, stop_audio, timestamp
+from processor import apply_hsv_adjust, aplicar_vision_nocturna_verde, aplicar_vision_termica, calcular_luminosidad, detect_motion_and_update, detect_faces, actualizar_heatmap, render_heatmap
 from recorder import RecorderManager
-from player import MediaPlayer   
+from zones import ZoneManager
+from alerts import AlertDispatcher, build_sinks
+from timeline import timeline_path
+from faces import FaceTracker
 
 class DetectorGUI:
-    def __init__(self, root, cap, backSub, face_cascade, cfg, frame_buffer, record_queue, lock):
+    def __init__(self, root, cap, backSub, face_cascade, cfg, frame_buffer, record_queue, lock, startup_timer=None):
+        # cap y face_cascade pueden llegar a None: se cargan en segundo plano (attach_camera / asignación)
         self.root = root
         self.cap = cap
         self.backSub = backSub
         self.face_cascade = face_cascade
         self.cfg = cfg
+        self.startup_timer = startup_timer
+        self.fps = cfg.FPS_FALLBACK
 
         self.frame_buffer = frame_buffer
         self.record_queue = record_queue
         self.lock = lock
 
         # recorder manager
-        self.recorder = RecorderManager(cfg.EVID_DIR, int(max(1, cap.get(cv2.CAP_PROP_FPS) or cfg.FPS_FALLBACK)),
-                                        frame_buffer, record_queue, lock)
+        self.recorder = RecorderManager(cfg.EVID_DIR, self.fps,
+                                        frame_buffer, record_queue, lock,
+                                        codec=cfg.RECORD_CODEC, mode=cfg.RECORD_MODE,
+                                        ring_slots=cfg.ENCODER_RING_SLOTS)
+
+        # alarma y notificaciones (hilo propio: nunca retrasan el bucle de frames)
+        self.alerts = AlertDispatcher(cfg.SONIDO_ALARMA, sinks=build_sinks(cfg),
+                                      sound_cooldown=cfg.ALARM_COOLDOWN, notify_cooldown=cfg.NOTIFY_COOLDOWN)
+
+        # caras: una mejor toma por pista e intervalo, no un recorte por frame
+        self.face_tracker = FaceTracker(cfg.EVID_DIR, iou_thr=cfg.FACE_TRACK_IOU, ttl=cfg.FACE_TRACK_TTL,
+                                        interval=cfg.FACE_SAVE_INTERVAL, hash_dist=cfg.FACE_HASH_DIST)
+
+        # vista remota opcional (MJPEG por HTTP)
+        self.stream = None
+        if cfg.STREAM_ENABLED:
+            # stream.py (y asyncio) solo se importa si se usa: está desactivado por defecto
+            from stream import LiveStreamServer
+            self.stream = LiveStreamServer(cfg.STREAM_HOST, cfg.STREAM_PORT, quality=cfg.STREAM_QUALITY,
+                                           max_fps=cfg.STREAM_MAX_FPS, widths=cfg.STREAM_WIDTHS)
+            self.stream.start()
 
         # UI state
         self.hue_shift = 0; self.sat_shift = 0; self.val_shift = 0
@@ -36,14 +63,36 @@ class DetectorGUI:
 
         # trayectoria
         self.tray_w, self.tray_h = 320, 240
-        import numpy as np
         self.trayectoria_img = np.zeros((self.tray_h, self.tray_w, 3), dtype=np.uint8)
-        self.puntos = []
+        self.puntos = deque(maxlen=512)  # solo hacen falta los últimos (la imagen guarda el dibujo)
+        # mapa de calor de actividad (panel alternativo a la trayectoria)
+        self.heatmap = np.zeros((self.tray_h, self.tray_w), dtype=np.float32)
+        self.show_heatmap = False
+
+        # zonas de detección (por cámara)
+        self.zones = ZoneManager(cfg.ZONES_FILE, cfg.CAMERA_INDEX)
+        self.zone_edit = False
+        self.zone_points = []
+        self.zone_kind = tk.StringVar(value="include")
 
         self._build_ui()
         self.prev_frame = None
         self.last_saved_time = 0
         self.last_list_refresh = 0
+        self.closing = False  # apagado en curso: el bucle deja de procesar frames
+        if cap is not None:
+            self.attach_camera(cap)
+
+    def attach_camera(self, cap):
+        """Asigna la cámara (abierta en segundo plano) y ajusta los FPS de bucle y grabación."""
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        self.fps = int(fps) if fps and fps > 0 else self.cfg.FPS_FALLBACK
+        self.recorder.fps = self.fps
+        self.cap = cap
+
+    def camera_failed(self):
+        messagebox.showerror("Error", "No se puede abrir la cámara")
+        self.shutdown()
 
     def _build_ui(self):
         root = self.root
@@ -54,7 +103,7 @@ class DetectorGUI:
         controls_frame.grid(row=0, column=1, padx=5, pady=5, sticky="n")
 
         # etiquetas de video
-        self.label_video = ttk.Label(video_frame); self.label_video.pack()
+        self.label_video = ttk.Label(video_frame, text="Abriendo cámara..."); self.label_video.pack()
         self.label_tray = ttk.Label(video_frame); self.label_tray.pack(pady=6)
 
         # scrollbars
@@ -70,8 +119,19 @@ class DetectorGUI:
         self.btn_thermal = ttk.Button(controls_frame, text="Toggle Termica (T)", command=self.toggle_thermal); self.btn_thermal.pack(fill="x", pady=4)
         self.btn_record = ttk.Button(controls_frame, text="Iniciar Grabación Manual", command=self.manual_toggle); self.btn_record.pack(fill="x", pady=4)
         self.btn_clear = ttk.Button(controls_frame, text="Limpiar Trayectoria", command=self.clear_tray); self.btn_clear.pack(fill="x", pady=4)
+        self.btn_heatmap = ttk.Button(controls_frame, text="Mapa de Calor (H)", command=self.toggle_heatmap); self.btn_heatmap.pack(fill="x", pady=4)
+        self.btn_timelapse = ttk.Button(controls_frame, text="Timelapse de Hoy", command=self.build_timelapse_today); self.btn_timelapse.pack(fill="x", pady=4)
         self.btn_toggle_alarm = ttk.Button(controls_frame, text="Toggle Alarma (S)", command=self.toggle_alarm); self.btn_toggle_alarm.pack(fill="x", pady=4)
 
+        # zonas de detección: click izq. añade vértice, click dcho. cierra el polígono
+        zones_frame = ttk.Frame(controls_frame); zones_frame.pack(fill="x", pady=(4,0))
+        ttk.Radiobutton(zones_frame, text="Incluir", variable=self.zone_kind, value="include").pack(side="left")
+        ttk.Radiobutton(zones_frame, text="Excluir", variable=self.zone_kind, value="exclude").pack(side="left")
+        self.btn_zone_edit = ttk.Button(controls_frame, text="Editar Zonas (Z)", command=self.toggle_zone_edit); self.btn_zone_edit.pack(fill="x", pady=2)
+        self.btn_zone_clear = ttk.Button(controls_frame, text="Borrar Zonas", command=self.clear_zones); self.btn_zone_clear.pack(fill="x", pady=2)
+        self.label_video.bind("<Button-1>", self._on_video_click)
+        self.label_video.bind("<Button-3>", lambda e: self.close_zone_polygon())
+
         # lista
         ttk.Label(controls_frame, text="Evidencias:").pack(anchor="w", pady=(8,0))
         self.listbox = tk.Listbox(controls_frame, height=10, width=40); self.listbox.pack(side="left", fill="both")
@@ -93,8 +153,8 @@ class DetectorGUI:
         # key bindings
         self.root.bind_all("<Key>", self._on_key)
 
-        # listar evidencias al inicio
-        self.refresh_list()
+        # listar evidencias al inicio (en segundo plano: la carpeta puede tener miles de ficheros)
+        self.refresh_list_async()
 
     # --- control botones ---
     def toggle_night(self):
@@ -123,9 +183,62 @@ class DetectorGUI:
             self.btn_record.config(text="Iniciar Grabación Manual")
 
     def clear_tray(self):
-        import numpy as np
         self.trayectoria_img = np.zeros((self.tray_h, self.tray_w, 3), dtype=np.uint8)
-        self.puntos = []
+        self.puntos = deque(maxlen=512)  # solo hacen falta los últimos (la imagen guarda el dibujo)
+        self.heatmap = np.zeros((self.tray_h, self.tray_w), dtype=np.float32)
+
+    def toggle_heatmap(self):
+        self.show_heatmap = not self.show_heatmap
+        self.btn_heatmap.config(text="Trayectoria (H)" if self.show_heatmap else "Mapa de Calor (H)")
+
+    def build_timelapse_today(self):
+        """Compila las fotos de hoy en un vídeo en segundo plano y refresca la lista al terminar."""
+        from timelapse import build_timelapse
+        self.btn_timelapse.config(state='disabled')
+        def _run():
+            path, error = None, None
+            try:
+                path = build_timelapse(self.cfg.EVID_DIR)
+            except Exception as e:
+                print("Error creando timelapse:", e)
+                error = e
+            def _done():
+                self.btn_timelapse.config(state='normal')
+                if error is not None:
+                    messagebox.showerror("Timelapse", f"No se pudo crear el timelapse:\n{error}")
+                elif path is None:
+                    messagebox.showinfo("Timelapse", "No hay fotos de intrusos de hoy.")
+                self.refresh_list()
+            self.root.after(0, _done)
+        threading.Thread(target=_run, daemon=True).start()
+
+    # --- zonas de detección ---
+    def toggle_zone_edit(self):
+        self.zone_edit = not self.zone_edit
+        if not self.zone_edit:
+            # salir de edición cierra el polígono pendiente (si es válido)
+            self.close_zone_polygon()
+        self.btn_zone_edit.config(text="Terminar Zonas (Z)" if self.zone_edit else "Editar Zonas (Z)")
+
+    def _on_video_click(self, event):
+        if not self.zone_edit:
+            return
+        # el vídeo se muestra a tamaño real: coordenadas del label = coordenadas del frame
+        self.zone_points.append((int(event.x), int(event.y)))
+
+    def close_zone_polygon(self):
+        # los puntos están en coordenadas del frame mostrado (el de análisis)
+        shape = self.prev_frame.shape if self.prev_frame is not None else None
+        if self.zones.add_polygon(self.zone_points, self.zone_kind.get(), frame_shape=shape):
+            self.zones.save()
+        self.zone_points = []
+
+    def clear_zones(self):
+        if not messagebox.askyesno("Zonas", "¿Borrar todas las zonas de esta cámara?"):
+            return
+        self.zone_points = []
+        self.zones.clear()
+        self.zones.save()
 
     def _update_status_modes(self):
         self.status_modes.config(text=f"Nocturna: {'ON' if self.night_mode else 'OFF'}  Termica: {'ON' if self.thermal_mode else 'OFF'}")
@@ -138,6 +251,10 @@ class DetectorGUI:
             self.toggle_thermal()
         elif k == 's':
             self.toggle_alarm()
+        elif k == 'z':
+            self.toggle_zone_edit()
+        elif k == 'h':
+            self.toggle_heatmap()
         elif k == 'q':
             # cierre seguro
             self.shutdown()
@@ -145,10 +262,21 @@ class DetectorGUI:
 
     # --- lista evidencias ---
     def refresh_list(self):
+        self._fill_list(list_evid_files(self.cfg.EVID_DIR))
+
+    def refresh_list_async(self):
+        """Lista la carpeta en un hilo y rellena la lista desde el hilo de Tk."""
+        def _list():
+            files = list_evid_files(self.cfg.EVID_DIR)
+            if self.startup_timer:
+                self.startup_timer.mark("lista evidencias")
+            self.root.after(0, lambda: self._fill_list(files))
+        threading.Thread(target=_list, daemon=True).start()
+
+    def _fill_list(self, files):
         self.listbox.delete(0, tk.END)
-        files = list_evid_files(self.cfg.EVID_DIR)
-        for f in files:
-            self.listbox.insert(tk.END, f)
+        if files:
+            self.listbox.insert(tk.END, *files)
 
     def delete_selected(self):
         sel = self.listbox.curselection()
@@ -158,6 +286,7 @@ class DetectorGUI:
         if messagebox.askyesno("Borrar", f"Borrar {filename}?"):
             try:
                 os.remove(path)
+                self._remove_sidecar(path)
                 self.refresh_list()
             except Exception as e:
                 messagebox.showerror("Error", str(e))
@@ -175,6 +304,7 @@ class DetectorGUI:
             path = os.path.join(self.cfg.EVID_DIR, fname)
             try:
                 os.remove(path)
+                self._remove_sidecar(path)
             except Exception as e:
                 errors.append(f"{fname}: {e}")
         self.refresh_list()
@@ -182,6 +312,14 @@ class DetectorGUI:
             messagebox.showwarning("Borrar todo", "Algunos archivos no pudieron eliminarse:\n" + "\n".join(errors))
 
 
+    def _remove_sidecar(self, path):
+        # línea temporal asociada a un vídeo (no aparece en la lista; la foto intruso_X.jpg comparte nombre)
+        if os.path.splitext(path)[1].lower() not in ('.avi', '.mp4', '.mov'):
+            return
+        side = timeline_path(path)
+        if os.path.exists(side):
+            os.remove(side)
+
     def play_selected(self):
         sel = self.listbox.curselection()
         if not sel:
@@ -189,48 +327,78 @@ class DetectorGUI:
             return
         files = list(self.listbox.get(0, tk.END))
         idx = sel[0]
-        # Aquí usamos MediaPlayer del módulo player.py (importado arriba)
+        # player.py se importa bajo demanda (no hace falta para arrancar)
+        from player import MediaPlayer
         MediaPlayer(self.root, self.cfg.EVID_DIR, files, idx)
 
     # --- main loop (llamado desde main) ---
     def loop_iteration(self):
+        # cámara todavía abriéndose en segundo plano (o cerrándose)
+        if self.cap is None or self.closing:
+            return None
         # lee frame
         ret, frame = self.cap.read()
         if not ret:
             return None
+
+        # flujo doble: análisis y pantalla sobre una copia reducida; el frame original
+        # (alta resolución) solo va al pre-roll, a las fotos de evidencia y a la grabación
+        full = None
+        aw = self.cfg.ANALYSIS_WIDTH
+        if aw and frame.shape[1] > aw:
+            full = frame
+            frame = cv2.resize(full, (aw, full.shape[0] * aw // full.shape[1]), interpolation=cv2.INTER_AREA)
+
         # HSV scrollbars
         self.hue_shift = int(self.hue_scale.get())
         self.sat_shift = int(self.sat_scale.get())
         self.val_shift = int(self.val_scale.get())
         frame = apply_hsv_adjust(frame, self.hue_shift, self.sat_shift, self.val_shift)
+        if full is not None:
+            # las evidencias siguen los sliders igual que en flujo simple (sin coste si están a 0)
+            full = apply_hsv_adjust(full, self.hue_shift, self.sat_shift, self.val_shift)
+        evid = full if full is not None else frame  # frame para evidencias
 
-        # buffer
-        self.frame_buffer.append(frame.copy())
+        # zona de análisis (recorte + máscara precalculados)
+        roi, roi_mask = self.zones.get_roi(frame.shape)
 
         # procesar movimiento y trayectoria
         info = detect_motion_and_update(frame, self.prev_frame, self.backSub, self.cfg.MIN_AREA,
                                         trayectoria_img=self.trayectoria_img, puntos=self.puntos,
-                                        tray_w=self.tray_w, tray_h=self.tray_h)
+                                        tray_w=self.tray_w, tray_h=self.tray_h,
+                                        roi=roi, roi_mask=roi_mask)
         vis_frame = info['frame_out']
         mov = info['mov']
+        actualizar_heatmap(self.heatmap, info['mask'], frame.shape, roi=roi, decay=self.cfg.HEATMAP_DECAY)
 
-        # caras
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        caras = self.face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30,30))
+        # caras (la cascada se carga en segundo plano)
+        caras = detect_faces(frame, self.face_cascade, roi=roi, roi_mask=roi_mask) if self.face_cascade is not None else []
         for (fx,fy,fw,fh) in caras:
             cv2.rectangle(vis_frame, (fx,fy), (fx+fw, fy+fh), (255,0,0), 2)
-            # guardar recorte de cara
-            ts = timestamp()
-            cv2.imwrite(os.path.join(self.cfg.EVID_DIR, f"cara_{ts}.jpg"), frame[fy:fy+fh, fx:fx+fw])
+        # guardar recortes de cara (solo la mejor toma de cada pista), recortados del frame de evidencias
+        if full is not None:
+            s = full.shape[1] / frame.shape[1]
+            self.face_tracker.update(full, [(int(fx*s), int(fy*s), int(fw*s), int(fh*s)) for (fx,fy,fw,fh) in caras])
+        else:
+            self.face_tracker.update(frame, caras)
+
+        # datos del frame para la línea temporal de las grabaciones: (área, caras, mov)
+        meta = (info['area'], len(caras), mov)
+
+        # buffer (se comprime en segundo plano; frame no se modifica después)
+        seq = self.frame_buffer.append(evid, meta)
+
+        # flujo doble: la grabación sigue al buffer comprimido en vez de a record_queue
+        self.recorder.follow_buffer = full is not None
 
         # movimiento confirmado -> guardar y grabar
         if mov:
             nowt = time.time()
             if nowt - self.last_saved_time >= self.cfg.TIMELAPSE:
-                cv2.imwrite(os.path.join(self.cfg.EVID_DIR, f"intruso_{timestamp()}.jpg"), frame)
+                path = os.path.join(self.cfg.EVID_DIR, f"intruso_{timestamp()}.jpg")
+                cv2.imwrite(path, evid)
                 self.last_saved_time = nowt
-                if self.alarm_enabled and os.path.exists(self.cfg.SONIDO_ALARMA):
-                    play_sound_nonblocking(self.cfg.SONIDO_ALARMA)
+                self.alerts.notify('intrusion', sound=self.alarm_enabled, file=path)
             if self.auto_record_enabled and not self.recorder.is_recording():
                 self.recorder.start_auto_recording_with_buffer(duration=self.cfg.VIDEO_DURATION)
 
@@ -244,12 +412,28 @@ class DetectorGUI:
             vis = vis_frame
 
         # añadir a la cola de grabación si está grabando
-        if self.recorder.is_recording():
-            if len(self.record_queue) < 500:
-                self.record_queue.append(vis.copy())
+        # (en flujo doble no hace falta: se graba evid, con el ajuste HSV pero sin los filtros
+        # noche/térmico de pantalla, desde el buffer comprimido donde ya está)
+        if self.recorder.is_recording() and full is None:
+            # límite en bytes, no en frames: 500 frames a 1080p serían ~3 GB
+            if len(self.record_queue) * vis.nbytes < self.cfg.RECORD_QUEUE_MAX_BYTES:
+                self.record_queue.append((vis.copy(), meta, seq))
+            else:
+                self.recorder.queue_dropped += 1
+
+        # dibujar zonas solo en pantalla (la copia grabada va sin ellas)
+        if self.zone_edit or self.zones.has_zones():
+            self.zones.draw(vis, self.zone_points, self.zone_kind.get())
+
+        # vista remota: solo se guarda la referencia, la codificación ocurre en el hilo del servidor
+        if self.stream is not None:
+            self.stream.publish(vis)
 
         # actualizar displays
-        self.status_motion.config(text=f"Movimiento: {'SI' if mov else 'NO'}")
+        if getattr(self.backSub, 'ready', True):
+            self.status_motion.config(text=f"Movimiento: {'SI' if mov else 'NO'}")
+        else:
+            self.status_motion.config(text="Movimiento: (calibrando fondo)")
         self.status_record.config(text=f"Grabando: {'SI' if self.recorder.is_recording() else 'NO'}")
         self._update_status_modes()
 
@@ -258,9 +442,13 @@ class DetectorGUI:
         imgtk = ImageTk.PhotoImage(Image.fromarray(vis_rgb))
         self.label_video.imgtk = imgtk
         self.label_video.config(image=imgtk)
+        if self.startup_timer and not self.startup_timer.reported:
+            self.startup_timer.mark("primer frame")
+            self.startup_timer.report()
 
-        # trayectoria
-        tray_rgb = cv2.cvtColor(self.trayectoria_img, cv2.COLOR_BGR2RGB)
+        # trayectoria o mapa de calor
+        panel = render_heatmap(self.heatmap) if self.show_heatmap else self.trayectoria_img
+        tray_rgb = cv2.cvtColor(panel, cv2.COLOR_BGR2RGB)
         tray_pil = Image.fromarray(tray_rgb).resize((320,240))
         traytk = ImageTk.PhotoImage(tray_pil)
         self.label_tray.imgtk = traytk
@@ -282,6 +470,14 @@ class DetectorGUI:
         except Exception:
             pass
 
+        # parar el bucle de frames y guardar las mejores tomas de cara pendientes aquí, en el hilo de Tk:
+        # FaceTracker.update() corre en este mismo hilo, así que flush() no puede cruzarse con él
+        self.closing = True
+        try:
+            self.face_tracker.flush()
+        except Exception as e:
+            print("Error guardando caras:", e)
+
         # lanzar hilo que hace la parada para no bloquear la GUI
         threading.Thread(target=self._shutdown_thread, daemon=True).start()
 
@@ -303,12 +499,16 @@ class DetectorGUI:
         except Exception:
             pass
 
-        # 4) detener audio
+        # 3c) parar la vista remota
+        if self.stream is not None:
+            self.stream.stop()
+
+        # 4) detener alertas y audio
         try:
-            import pygame
-            pygame.mixer.stop()
+            self.alerts.stop()
         except Exception:
             pass
+        stop_audio()
 
         # 5) liberar cámara 
         try:
@@ -1,44 +1,90 @@
 # main.py
 # Archivo que arranca todo y lanza la GUI
 # Aquí también está el loop que usa root.after para iterar y llamar a DetectorGUI.loop_iteration()
+# Arranque: primero la ventana; cámara, cascada Haar y audio se inicializan en segundo plano.
+import time
+_T0 = time.perf_counter()  # referencia para el desglose de arranque (incluye imports)
+
 import cv2
 import tkinter as tk
 from collections import deque
 import threading
-import time
 import os
 
 import config as cfg
-from utils import list_evid_files
+from utils import StartupTimer, init_audio_async, load_sound
 from gui import DetectorGUI
+from prebuffer import CompressedFrameBuffer
+from background import WarmStartSubtractor
 
-def main():
-    # inicializar cámara y detectores
-    cap = cv2.VideoCapture(0)
+def open_camera(cfg):
+    """Abre la cámara y aplica los ajustes de captura de config.py (FOURCC antes que la resolución)."""
+    cap = cv2.VideoCapture(cfg.CAMERA_INDEX)
     if not cap.isOpened():
-        raise RuntimeError("No se puede abrir la cámara")
+        return cap
+    if cfg.CAMERA_FOURCC:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*cfg.CAMERA_FOURCC))
+    if cfg.CAMERA_WIDTH and cfg.CAMERA_HEIGHT:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, cfg.CAMERA_WIDTH)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, cfg.CAMERA_HEIGHT)
+    if cfg.CAMERA_FPS:
+        cap.set(cv2.CAP_PROP_FPS, cfg.CAMERA_FPS)
+    if cfg.CAMERA_BUFFERSIZE:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, cfg.CAMERA_BUFFERSIZE)
+    # el driver puede no aceptar lo pedido: mostrar lo que ha quedado
+    fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+    fourcc_str = "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)) if fourcc else "?"
+    print(f"[main] Cámara {int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x{int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))} "
+          f"@ {cap.get(cv2.CAP_PROP_FPS):.0f} fps, {fourcc_str}")
+    return cap
 
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    if not fps or fps <= 0:
-        fps = cfg.FPS_FALLBACK
+def main():
+    timer = StartupTimer(_T0)
+    timer.mark("imports")
 
-    haar = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-    face_cascade = cv2.CascadeClassifier(haar)
-    backSub = cv2.createBackgroundSubtractorMOG2(history=500, varThreshold=16, detectShadows=True)
+    # detectores baratos de crear (la cascada y la cámara van en segundo plano)
+    backSub = WarmStartSubtractor(cv2.createBackgroundSubtractorMOG2(history=500, varThreshold=16, detectShadows=True),
+                                  os.path.join(cfg.BG_DIR, f"fondo_cam{cfg.CAMERA_INDEX}"),
+                                  warmup_frames=cfg.BG_WARMUP_FRAMES, snapshot_every=cfg.BG_SNAPSHOT_EVERY)
 
     # buffers y lock
-    frame_buffer = deque(maxlen=cfg.FRAME_BUFFER_SIZE)
+    frame_buffer = CompressedFrameBuffer(max_bytes=cfg.PREROLL_MAX_BYTES, max_seconds=cfg.PREROLL_SECONDS,
+                                         quality=cfg.PREROLL_JPEG_QUALITY)
     record_queue = deque()
     lock = threading.Lock()
 
-    # lanzar GUI
+    # lanzar GUI (sin cámara todavía)
     root = tk.Tk()
-    app = DetectorGUI(root, cap, backSub, face_cascade, cfg, frame_buffer, record_queue, lock)
+    app = DetectorGUI(root, None, backSub, None, cfg, frame_buffer, record_queue, lock, startup_timer=timer)
+    timer.mark("ventana")
+
+    # inicialización en segundo plano
+    cam = {}
+    def _open_camera():
+        cap = open_camera(cfg)
+        timer.mark("cámara")
+        if not cap.isOpened():
+            root.after(0, app.camera_failed)
+            return
+        cam['cap'] = cap
+        root.after(0, lambda: app.attach_camera(cap))
+
+    def _load_cascade():
+        haar = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        app.face_cascade = cv2.CascadeClassifier(haar)  # hasta entonces no se buscan caras
+        timer.mark("cascada Haar")
+
+    threading.Thread(target=_open_camera, daemon=True).start()
+    threading.Thread(target=_load_cascade, daemon=True).start()
+    def _audio_ready():
+        load_sound(cfg.SONIDO_ALARMA)  # decodificar la alarma una vez, antes de la primera intrusión
+        timer.mark("audio")
+    init_audio_async(on_done=_audio_ready)
 
     # preparar el bucle
     def loop():
         app.loop_iteration()
-        root.after(int(1000 / max(1, fps)), loop)
+        root.after(int(1000 / max(1, app.fps)), loop)
 
     root.after(0, loop)
     root.protocol("WM_DELETE_WINDOW", app.shutdown)
@@ -51,7 +97,11 @@ def main():
             app.recorder.stop_manual_recording()
         except Exception:
             pass
-    cap.release()
+    # guardar el fondo aprendido para el próximo arranque (el bucle ya no llama a apply)
+    backSub.snapshot()
+    frame_buffer.stop()
+    if 'cap' in cam:
+        cam['cap'].release()
     cv2.destroyAllWindows()
 
 if __name__ == "__main__":
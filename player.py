@@ -8,6 +8,8 @@ from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
 import cv2
 
+from timeline import load_timeline, event_starts, activity_columns
+
 class MediaPlayer:
     """
     MediaPlayer independiente.
@@ -38,12 +40,23 @@ class MediaPlayer:
         self.btn_play.pack(side="left", padx=2)
         self.btn_next = ttk.Button(ctrl, text="Next >>", command=self.next_file)
         self.btn_next.pack(side="left", padx=2)
+        # saltos entre tramos de actividad (según la línea temporal guardada con el vídeo)
+        self.btn_prev_ev = ttk.Button(ctrl, text="<< Evento", command=self.prev_event)
+        self.btn_prev_ev.pack(side="left", padx=(12,2))
+        self.btn_next_ev = ttk.Button(ctrl, text="Evento >>", command=self.next_event)
+        self.btn_next_ev.pack(side="left", padx=2)
         self.btn_close = ttk.Button(ctrl, text="Cerrar", command=self.on_close)
         self.btn_close.pack(side="right", padx=2)
 
         # barra de progreso
         self.scale = ttk.Scale(self.top, from_=0, to=1, orient="horizontal", command=self.on_scale_move)
-        self.scale.pack(fill="x", padx=6, pady=6)
+        self.scale.pack(fill="x", padx=6, pady=(6,0))
+
+        # franja de actividad bajo la barra (rojo = movimiento confirmado, azul = caras)
+        self.strip = tk.Canvas(self.top, height=16, bg="#202020", highlightthickness=0)
+        self.strip.pack(fill="x", padx=6, pady=(2,6))
+        self.strip.bind("<Configure>", lambda e: self._draw_strip())
+        self.strip.bind("<Button-1>", self._on_strip_click)
         self.scale_enabled = False
         self.user_seek = False
         self.playing = False
@@ -57,6 +70,8 @@ class MediaPlayer:
         self.total_frames = 0
         self.cur_frame = 0
         self.cur_fps = 25  # fallback
+        self.timeline = None
+        self.events = []
         self._open_current()
 
     @property
@@ -93,6 +108,9 @@ class MediaPlayer:
             self.lbl.config(image=self.photo)
             self.scale.state(['disabled'])
             self.scale_enabled = False
+            self.timeline = None
+            self.events = []
+            self._draw_strip()
             self.playing = False
             self.btn_play.config(text="Play")
             self.time_label.config(text=f"Imagen {self.index+1}/{len(self.files)}")
@@ -118,6 +136,11 @@ class MediaPlayer:
         self.scale.config(from_=0, to=max(1, self.total_frames-1))
         self.scale.set(0)
         self.cur_frame = 0
+
+        # línea temporal (sidecar): se lee sin decodificar el vídeo
+        self.timeline = load_timeline(path)
+        self.events = list(event_starts(self.timeline)) if self.timeline is not None else []
+        self._draw_strip()
         self.playing = True
         self.btn_play.config(text="Pause")
         self._play_loop()
@@ -152,6 +175,7 @@ class MediaPlayer:
         total_s = int(self.total_frames / max(1, self.cur_fps))
         cur_s = int(self.cur_frame / max(1, self.cur_fps))
         self.time_label.config(text=f"{time.strftime('%M:%S', time.gmtime(cur_s))} / {time.strftime('%M:%S', time.gmtime(total_s))}")
+        self._draw_cursor()
 
         delay = int(1000 / max(1, self.cur_fps))
         self.top.after(delay, self._play_loop)
@@ -175,12 +199,16 @@ class MediaPlayer:
     def on_scale_move(self, val):
         if not self.scale_enabled or self.user_seek:
             return
-        pos = int(float(val))
+        self._seek(int(float(val)))
+
+    def _seek(self, pos):
         if self.cap:
             self.cap.set(cv2.CAP_PROP_POS_FRAMES, pos)
             self.cur_frame = pos
             ret, frame = self.cap.read()
             if ret:
+                # igual que en _play_loop: cur_frame = siguiente frame a leer
+                self.cur_frame = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
                 frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 img_pil = Image.fromarray(frame_rgb)
                 w, h = img_pil.size
@@ -191,6 +219,59 @@ class MediaPlayer:
             total_s = int(self.total_frames / max(1, self.cur_fps))
             cur_s = int(self.cur_frame / max(1, self.cur_fps))
             self.time_label.config(text=f"{time.strftime('%M:%S', time.gmtime(cur_s))} / {time.strftime('%M:%S', time.gmtime(total_s))}")
+            # mover la barra sin disparar on_scale_move
+            self.user_seek = True
+            try:
+                self.scale.set(self.cur_frame)
+            finally:
+                self.top.after(10, lambda: setattr(self, 'user_seek', False))
+            self._draw_cursor()
+
+    # --- línea temporal de actividad ---
+    def _draw_strip(self):
+        self.strip.delete("all")
+        if self.timeline is None or len(self.timeline) == 0:
+            return
+        w = self.strip.winfo_width()
+        h = int(self.strip.cget("height"))
+        level, mov, faces = activity_columns(self.timeline, w)
+        for x in range(len(level)):
+            if level[x] <= 0 and not faces[x]:
+                continue
+            bar = max(2, int(level[x] * (h - 3)))
+            color = "#e03030" if mov[x] else "#c0a030"
+            self.strip.create_line(x, h, x, h - bar, fill=color)
+            if faces[x]:
+                self.strip.create_line(x, 0, x, 3, fill="#3080ff")
+        self._draw_cursor()
+
+    def _draw_cursor(self):
+        self.strip.delete("cursor")
+        if self.timeline is None or self.total_frames <= 1:
+            return
+        x = int(self.cur_frame * self.strip.winfo_width() / self.total_frames)
+        self.strip.create_line(x, 0, x, int(self.strip.cget("height")), fill="white", tags="cursor")
+
+    def _on_strip_click(self, event):
+        if self.timeline is None:
+            return
+        w = max(1, self.strip.winfo_width())
+        self._seek(int(event.x * self.total_frames / w))
+
+    def next_event(self):
+        shown = max(0, self.cur_frame - 1)  # cur_frame apunta al siguiente frame a leer
+        for start in self.events:
+            if start > shown:
+                self._seek(int(start))
+                return
+
+    def prev_event(self):
+        # margen de medio segundo para que pulsar varias veces siga retrocediendo
+        shown = max(0, self.cur_frame - 1) - int(self.cur_fps / 2)
+        for start in reversed(self.events):
+            if start < shown:
+                self._seek(int(start))
+                return
 
     def prev_file(self):
         if self.index > 0:
@@ -0,0 +1,144 @@
+# prebuffer.py
+# Buffer previo (pre-roll) de frames comprimidos en JPEG, limitado por bytes y segundos
+import time
+import threading
+from collections import deque, namedtuple
+import numpy as np
+import cv2
+
+# meta = (area, caras, mov) del frame para la línea temporal de la grabación (o None)
+# seq = nº de frame creciente (detecta huecos al seguir el buffer con since())
+EncodedFrame = namedtuple("EncodedFrame", ["data", "shape", "ts", "meta", "seq"])
+RawFrame = namedtuple("RawFrame", ["frame", "shape", "ts", "meta", "seq"])  # pendiente de comprimir
+
+def decode_frame(item):
+    """Devuelve el frame BGR de una entrada del buffer (EncodedFrame o RawFrame aún sin comprimir)."""
+    if isinstance(item, EncodedFrame):
+        return cv2.imdecode(np.frombuffer(item.data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return item.frame
+
+class CompressedFrameBuffer:
+    """
+    Sustituto de deque(maxlen=N) para el pre-roll.
+    append() solo encola el frame; un hilo aparte lo comprime a JPEG (cv2.imencode libera el GIL)
+    y descarta los más antiguos cuando se supera max_bytes o max_seconds.
+    snapshot() devuelve las entradas comprimidas más los frames aún pendientes de comprimir,
+    para no perder los últimos frames antes del disparo; since(seq) devuelve los posteriores
+    a uno dado, para que una grabación siga al buffer después del disparo.
+    Uso:
+        buf = CompressedFrameBuffer(max_bytes=32*1024*1024, max_seconds=25, quality=80)
+        buf.append(frame, meta)
+        for item in buf.snapshot(): frame, meta = decode_frame(item), item.meta
+    """
+    def __init__(self, max_bytes=32 * 1024 * 1024, max_seconds=25.0, quality=80, max_pending=8):
+        self.max_bytes = int(max_bytes)
+        self.max_seconds = float(max_seconds)
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+
+        self._entries = deque()  # EncodedFrame
+        self._bytes = 0
+        self._seq = 0
+        self._last_budget_log = 0.0  # aviso (limitado) cuando el presupuesto de bytes recorta el pre-roll
+        self._pending = deque(maxlen=max_pending)  # RawFrame sin comprimir
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._encode_loop, name="prebuffer", daemon=True)
+        self._thread.start()
+
+    # ---------- productor (hilo de la GUI) ----------
+    def append(self, frame, meta=None):
+        """Encola el frame para comprimirlo. Devuelve su número de frame (seq)."""
+        with self._lock:
+            # si el hilo no da abasto, maxlen descarta el pendiente más antiguo
+            self._seq += 1
+            seq = self._seq
+            self._pending.append(RawFrame(frame, frame.shape, time.time(), meta, seq))
+        self._wake.set()
+        return seq
+
+    # ---------- hilo compresor ----------
+    def _encode_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(0.5)
+            self._wake.clear()
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        break
+                    raw = self._pending[0]
+                ok, jpg = cv2.imencode('.jpg', raw.frame, self.params)
+                with self._lock:
+                    # quitar el pendiente ya comprimido (si no lo ha expulsado maxlen mientras tanto)
+                    if self._pending and self._pending[0] is raw:
+                        self._pending.popleft()
+                    if not ok:
+                        continue
+                    data = jpg.tobytes()
+                    self._entries.append(EncodedFrame(data, raw.shape, raw.ts, raw.meta, raw.seq))
+                    self._bytes += len(data)
+                    self._evict(raw.ts)
+
+    def _evict(self, now):
+        # llamado con el lock cogido
+        byte_bound = False
+        while self._entries and (self._bytes > self.max_bytes or now - self._entries[0].ts > self.max_seconds):
+            byte_bound = byte_bound or now - self._entries[0].ts <= self.max_seconds
+            old = self._entries.popleft()
+            self._bytes -= len(old.data)
+        if byte_bound and now - self._last_budget_log >= 60.0:
+            # el límite de memoria manda: informar de los segundos de pre-roll que caben de verdad
+            self._last_budget_log = now
+            print(f"[prebuffer] Pre-roll limitado por memoria: {self._seconds():.1f} s de {self.max_seconds:.0f} s "
+                  f"({self._bytes // 1024} KB, {len(self._entries)} frames); "
+                  f"subir PREROLL_MAX_BYTES o bajar PREROLL_JPEG_QUALITY")
+
+    def _seconds(self):
+        # llamado con el lock cogido
+        return self._entries[-1].ts - self._entries[0].ts if len(self._entries) > 1 else 0.0
+
+    # ---------- consumidores ----------
+    def snapshot(self):
+        """Lista ordenada de entradas (EncodedFrame o RawFrame pendiente). Decodificar con decode_frame()."""
+        with self._lock:
+            items = list(self._entries)
+            items.extend(self._pending)
+        return items
+
+    def since(self, seq):
+        """Entradas con número de frame mayor que seq, en orden (comprimidas y pendientes).
+        Si faltan números es que se expulsaron antes de leerlos."""
+        with self._lock:
+            newer = []
+            for item in reversed(self._entries):
+                if item.seq <= seq:
+                    break
+                newer.append(item)
+            newer.reverse()
+            newer.extend(item for item in self._pending if item.seq > seq)
+        return newer
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self._bytes = 0
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(1.0)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    @property
+    def seconds(self):
+        """Segundos de pre-roll disponibles ahora mismo."""
+        with self._lock:
+            return self._seconds()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries) + len(self._pending)
@@ -50,20 +50,45 @@ def calcular_luminosidad(frame):
     return np.mean(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
 
 def detect_motion_and_update(frame, prev_frame, backSub, min_area,
-                             trayectoria_img=None, puntos=None, tray_w=320, tray_h=240):
+                             trayectoria_img=None, puntos=None, tray_w=320, tray_h=240,
+                             roi=None, roi_mask=None):
     """Aplica background subtractor + diferencia de frames + dibuja trayectorias (si se pasan objetos). 
     Devuelve: dict {movimiento_mog (bool), motion_diff(bool), mov_combined(bool), cnts, frame_out}
     Además actualiza trayectoria_img y puntos si hay movimiento.
+    Si se pasa roi (x, y, w, h) solo se analiza ese recorte y roi_mask (tamaño del recorte) anula
+    lo que queda fuera de las zonas. mask y cnts quedan en coordenadas del recorte.
     """
     result = {}
     frame_out = frame.copy()
 
+    # recorte a la zona de detección
+    ox, oy = 0, 0
+    sub, prev_sub = frame, prev_frame
+    if roi is not None:
+        ox, oy, rw, rh = roi
+        if rw <= 0 or rh <= 0:
+            # todo excluido: nada que analizar
+            result['mask'] = None
+            result['area'] = 0
+            result['cnts'] = []
+            result['movimiento_mog'] = False
+            result['motion_diff'] = False
+            result['mov'] = False
+            result['frame_out'] = frame_out
+            return result
+        sub = frame[oy:oy+rh, ox:ox+rw]
+        if prev_frame is not None:
+            prev_sub = prev_frame[oy:oy+rh, ox:ox+rw]
+
     # MOG/KNN mask (MOG funciona mejor para entornos dinámicos que KNN)
-    mask = backSub.apply(frame)
+    # nota: si cambia el tamaño del recorte MOG2 reinicia su modelo solo
+    mask = backSub.apply(sub)
     mask[mask == 127] = 0 # Eliminar sombras
     kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5,5)) # suavizado
     mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel) # Apertura morfológica Dilate -> Erode para limpiar ruido
     mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel) # Cierre morfológico Erode -> Dilate para cerrar huecos
+    if roi_mask is not None:
+        mask = cv2.bitwise_and(mask, roi_mask) # descartar zonas excluidas
     cnts, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
     movimiento_mog = False
@@ -71,6 +96,7 @@ def detect_motion_and_update(frame, prev_frame, backSub, min_area,
         if cv2.contourArea(c) >= min_area:
             movimiento_mog = True
             x,y,w,h = cv2.boundingRect(c)
+            x += ox; y += oy # a coordenadas del frame completo
             cv2.rectangle(frame_out, (x,y), (x+w, y+h), (0,255,0), 2)
             if trayectoria_img is not None and puntos is not None:
                 cx = x + w//2
@@ -79,18 +105,20 @@ def detect_motion_and_update(frame, prev_frame, backSub, min_area,
                 ty = int(cy * tray_h / frame.shape[0])
                 puntos.append((tx, ty))
                 if len(puntos) >= 2:
-                    for i in range(1, len(puntos)):
-                        cv2.line(trayectoria_img, puntos[i-1], puntos[i], (0,255,255), 2)
+                    # trayectoria_img acumula lo ya dibujado: basta con el último segmento
+                    cv2.line(trayectoria_img, puntos[-2], puntos[-1], (0,255,255), 2)
             break
 
     # difference motion
     motion_diff = False
-    if prev_frame is not None:
-        diff = cv2.absdiff(prev_frame, frame) # Diferencia absoluta para mantener color
+    if prev_sub is not None:
+        diff = cv2.absdiff(prev_sub, sub) # Diferencia absoluta para mantener color
         gray_diff = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY) # Escala grises
         _, diff_bin = cv2.threshold(gray_diff, 25, 255, cv2.THRESH_BINARY) # Umbral para binarizar
         diff_bin = cv2.morphologyEx(diff_bin, cv2.MORPH_OPEN, kernel) # Apertura morfológica Dilate -> Erode para limpiar ruido
         diff_bin = cv2.morphologyEx(diff_bin, cv2.MORPH_CLOSE, kernel) # Cierre morfológico Erode -> Dilate para cerrar huecos
+        if roi_mask is not None:
+            diff_bin = cv2.bitwise_and(diff_bin, roi_mask)
         cnts_diff, _ = cv2.findContours(diff_bin, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         for c in cnts_diff:
             if cv2.contourArea(c) >= min_area:
@@ -98,9 +126,60 @@ def detect_motion_and_update(frame, prev_frame, backSub, min_area,
                 break
 
     result['mask'] = mask
+    result['area'] = cv2.countNonZero(mask) # píxeles en movimiento (para la línea temporal)
     result['cnts'] = cnts
     result['movimiento_mog'] = movimiento_mog
     result['motion_diff'] = motion_diff
     result['mov'] = movimiento_mog and motion_diff
     result['frame_out'] = frame_out
     return result
+
+def detect_faces(frame, face_cascade, roi=None, roi_mask=None):
+    """Detecta caras con Haar solo dentro de la zona (si se pasa roi/roi_mask).
+    Devuelve lista de (x, y, w, h) en coordenadas del frame completo.
+    """
+    ox, oy = 0, 0
+    sub = frame
+    if roi is not None:
+        ox, oy, rw, rh = roi
+        if rw <= 0 or rh <= 0:
+            return []
+        sub = frame[oy:oy+rh, ox:ox+rw]
+    gray = cv2.cvtColor(sub, cv2.COLOR_BGR2GRAY)
+    caras = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30,30))
+    out = []
+    for (fx,fy,fw,fh) in caras:
+        # descartar caras cuyo centro cae en zona excluida
+        if roi_mask is not None and roi_mask[fy + fh//2, fx + fw//2] == 0:
+            continue
+        out.append((int(fx) + ox, int(fy) + oy, int(fw), int(fh)))
+    return out
+
+def actualizar_heatmap(heat, mask, frame_shape, roi=None, decay=0.998):
+    """Mapa de calor de actividad acumulada (float32, tamaño del panel), actualizado en bloque
+    con la máscara de movimiento de detect_motion_and_update. decay atenúa lo antiguo en cada frame.
+    mask está en coordenadas del recorte roi (o del frame completo si roi es None)."""
+    heat *= decay
+    if mask is None:
+        return heat
+    hh, hw = heat.shape[:2]
+    fh, fw = frame_shape[:2]
+    ox, oy, rw, rh = roi if roi is not None else (0, 0, fw, fh)
+    # rectángulo del recorte en coordenadas del mapa
+    x0, y0 = ox * hw // fw, oy * hh // fh
+    x1, y1 = max(x0 + 1, (ox + rw) * hw // fw), max(y0 + 1, (oy + rh) * hh // fh)
+    x1, y1 = min(x1, hw), min(y1, hh)
+    if x1 <= x0 or y1 <= y0:
+        return heat
+    # INTER_AREA promedia: cada celda recibe la fracción de píxeles en movimiento que cubre
+    small = cv2.resize(mask, (x1 - x0, y1 - y0), interpolation=cv2.INTER_AREA)
+    heat[y0:y1, x0:x1] += small.astype(np.float32) * (1.0 / 255.0)
+    return heat
+
+def render_heatmap(heat):
+    """Convierte el mapa de calor en imagen BGR (colormap JET, escala logarítmica)."""
+    peak = float(heat.max())
+    if peak <= 0:
+        return np.zeros(heat.shape[:2] + (3,), dtype=np.uint8)
+    norm = (np.log1p(heat) * (255.0 / np.log1p(peak))).astype(np.uint8)
+    return cv2.applyColorMap(norm, cv2.COLORMAP_JET)
@@ -1,19 +1,29 @@
 # recorder.py 
-# Grabación de video (auto y manual) con buffer previo
+# Grabación de video (auto y manual) con buffer previo (pre-roll comprimido)
 import time
 import threading
 import os
 import cv2
 from collections import deque
 
+from encoder import EncoderProcess
+from prebuffer import CompressedFrameBuffer, decode_frame
+from timeline import TimelineWriter
+
 class RecorderManager:
-    def __init__(self, evid_dir, fps, frame_buffer: deque, record_queue: deque, lock: threading.Lock):
+    def __init__(self, evid_dir, fps, frame_buffer: CompressedFrameBuffer, record_queue: deque, lock: threading.Lock,
+                 codec='XVID', mode='thread', ring_slots=32):
         self.evid_dir = evid_dir
         self.fps = fps
         self.frame_buffer = frame_buffer
         self.record_queue = record_queue
         self.lock = lock
 
+        # codec y modo de codificación ('thread' = cv2.VideoWriter en este proceso, 'process' = proceso hijo)
+        self.codec = codec
+        self.mode = mode
+        self.encoder = EncoderProcess(slots=ring_slots) if mode == 'process' else None
+
         self.auto_thread = None
         self.auto_stop_event = None
         self.manual_thread = None
@@ -22,54 +32,119 @@ class RecorderManager:
         self.recording_flag = False
         self.manual_recording_flag = False
 
+        # follow_buffer=True: los frames posteriores al disparo se leen del buffer comprimido
+        # (flujo doble: a alta resolución record_queue solo admitiría unos pocos segundos sin comprimir).
+        # queue_dropped: frames que la GUI no pudo meter en record_queue por el límite de memoria.
+        self.follow_buffer = False
+        self.queue_dropped = 0
+        # último frame del buffer ya escrito en algún vídeo: el pre-roll del clip siguiente
+        # empieza después, para no repetir lo grabado en el anterior durante una intrusión continua
+        self.last_written_seq = 0
+
     def _make_writer(self, path, frame_shape):
-        fourcc = cv2.VideoWriter_fourcc(*'XVID')
+        if self.encoder is not None:
+            # mismo interfaz que cv2.VideoWriter, pero la compresión ocurre en el proceso hijo
+            return self.encoder.open_writer(path, self.codec, self.fps, frame_shape)
+        fourcc = cv2.VideoWriter_fourcc(*self.codec)
         h, w = frame_shape[:2]
         # nota: OpenCV quiere (width, height)
         return cv2.VideoWriter(path, fourcc, max(1, int(self.fps)), (w, h))
 
+    def _write(self, writer, timeline, frame, meta, seq):
+        # ProcessWriter.write devuelve False si descarta el frame (anillo lleno); cv2.VideoWriter devuelve None.
+        # Solo se anota en la línea temporal lo que llega al vídeo, para que las filas coincidan con los frames.
+        if writer.write(frame) is not False:
+            timeline.append(meta)
+        if seq > self.last_written_seq:
+            self.last_written_seq = seq
+
+    def _drain_post(self, writer, timeline, state):
+        """Escribe los frames posteriores al disparo disponibles ahora. Devuelve cuántos."""
+        if state['follow']:
+            items = self.frame_buffer.since(state['seq'])
+            for it in items:
+                # huecos en la numeración = frames expulsados del buffer antes de grabarlos
+                state['dropped'] += max(0, it.seq - state['seq'] - 1)
+                state['seq'] = it.seq
+                self._write(writer, timeline, decode_frame(it), it.meta, it.seq)
+            return len(items)
+        n = 0
+        while True:
+            try:
+                frame_to_write, meta, seq = self.record_queue.popleft()
+            except IndexError:
+                return n
+            n += 1
+            if seq <= self.last_written_seq:
+                continue  # sobrante del clip anterior que ya entró en el pre-roll de este
+            self._write(writer, timeline, frame_to_write, meta, seq)
+
+    @staticmethod
+    def _close(writer, timeline, filename):
+        # writer que nunca se abrió (codec no disponible, también en el proceso hijo): sin vídeo no hay sidecar
+        opened = writer.isOpened()
+        writer.release()
+        if opened:
+            timeline.close()
+        else:
+            timeline.discard()
+            print("[recorder] No se pudo crear el vídeo:", filename)
+
+    def _preroll(self):
+        """Entradas del buffer aún no grabadas y tamaño de frame del clip (o None si no hay frames)."""
+        buf_copy = self.frame_buffer.since(self.last_written_seq)  # JPEG: se decodifican en el hilo de grabación
+        if buf_copy:
+            return buf_copy, buf_copy[0].shape
+        # todo lo del buffer está ya grabado: solo hace falta el tamaño del último frame
+        last = self.frame_buffer.snapshot()[-1:]
+        return buf_copy, (last[0].shape if last else None)
+
+    def _post_state(self, buf_copy):
+        return {'follow': self.follow_buffer, 'seq': buf_copy[-1].seq if buf_copy else self.last_written_seq,
+                'dropped': 0, 'queue_dropped0': self.queue_dropped}
+
+    def _report_dropped(self, filename, state):
+        dropped = state['dropped'] + (self.queue_dropped - state['queue_dropped0'])
+        if dropped > 0:
+            print(f"[recorder] {filename}: {dropped} frames posteriores al disparo descartados")
+
     # ---------- AUTO recording ----------
     def start_auto_recording_with_buffer(self, duration=6):
         """Inicia grabación automática: buffer previo + duration segundos posteriores."""
         if self.auto_thread and self.auto_thread.is_alive():
             return  # ya grabando auto
 
-        buf_copy = [f.copy() for f in list(self.frame_buffer)]
+        buf_copy, frame_shape = self._preroll()
+        state = self._post_state(buf_copy)
         stop_event = threading.Event()
         self.auto_stop_event = stop_event
-        t = threading.Thread(target=self._auto_rec_thread, args=(buf_copy, duration, stop_event))
+        t = threading.Thread(target=self._auto_rec_thread, args=(buf_copy, frame_shape, duration, stop_event, state))
         t.start()
         self.auto_thread = t
 
-    def _auto_rec_thread(self, buf_copy, duration_sec, stop_event: threading.Event):
+    def _auto_rec_thread(self, buf_copy, frame_shape, duration_sec, stop_event: threading.Event, state):
         self.recording_flag = True
         timestamp = time.strftime("%d%m%Y_%H%M%S")
         filename = os.path.join(self.evid_dir, f"intruso_{timestamp}.avi")
-        if len(buf_copy) > 0:
-            frame_shape = buf_copy[0].shape
-        else:
+        if frame_shape is None:
             # no buffer -> intentar sacar tamaño de la cámara (si no disponible, abandona)
             raise RuntimeError("Auto-record buffer vacío.")
         writer = self._make_writer(filename, frame_shape)
+        timeline = TimelineWriter(filename)
 
         try:
             # escribir buffer previo
             for f in buf_copy:
-                writer.write(f)
+                self._write(writer, timeline, decode_frame(f), f.meta, f.seq)
 
             end_time = time.time() + duration_sec
             while time.time() < end_time and (not stop_event.is_set()):
-                frame_to_write = None
-                try:
-                    frame_to_write = self.record_queue.popleft()
-                except IndexError:
+                if self._drain_post(writer, timeline, state) == 0:
                     # sin frames, esperar un poco y volver a intentar
                     time.sleep(0.01)
-                    continue
-                if frame_to_write is not None:
-                    writer.write(frame_to_write)
         finally:
-            writer.release()
+            self._close(writer, timeline, filename)
+            self._report_dropped(filename, state)
             self.recording_flag = False
             print("[recorder] Auto-record guardado:", filename)
 
@@ -78,40 +153,36 @@ class RecorderManager:
         """Inicia grabación manual (se detiene con stop_manual_recording o stop_all)."""
         if self.manual_thread and self.manual_thread.is_alive():
             return  # ya está grabando manual
-        buf_copy = [f.copy() for f in list(self.frame_buffer)]
+        buf_copy, frame_shape = self._preroll()
+        state = self._post_state(buf_copy)
         stop_event = threading.Event()
         self.manual_stop_event = stop_event
-        t = threading.Thread(target=self._manual_rec_thread, args=(buf_copy, stop_event))
+        t = threading.Thread(target=self._manual_rec_thread, args=(buf_copy, frame_shape, stop_event, state))
         t.start()
         self.manual_thread = t
 
-    def _manual_rec_thread(self, buf_copy, stop_event: threading.Event):
+    def _manual_rec_thread(self, buf_copy, frame_shape, stop_event: threading.Event, state):
         self.manual_recording_flag = True
         timestamp = time.strftime("%d%m%Y_%H%M%S")
         filename = os.path.join(self.evid_dir, f"intruso_manual_{timestamp}.avi")
-        if len(buf_copy) > 0:
-            frame_shape = buf_copy[0].shape
-        else:
+        if frame_shape is None:
             raise RuntimeError("Manual-record buffer vacío.")
         writer = self._make_writer(filename, frame_shape)
+        timeline = TimelineWriter(filename)
 
         try:
             for f in buf_copy:
-                writer.write(f)
+                self._write(writer, timeline, decode_frame(f), f.meta, f.seq)
 
             print("[recorder] Grabando manual:", filename)
             # continuar hasta que stop_event se ponga a True
-            while (not stop_event.is_set()) or len(self.record_queue) > 0:
-                frame_to_write = None
-                try:
-                    frame_to_write = self.record_queue.popleft()
-                except IndexError:
+            while not stop_event.is_set():
+                if self._drain_post(writer, timeline, state) == 0:
                     time.sleep(0.01)
-                    continue
-                if frame_to_write is not None:
-                    writer.write(frame_to_write)
+            self._drain_post(writer, timeline, state)  # lo que quede pendiente
         finally:
-            writer.release()
+            self._close(writer, timeline, filename)
+            self._report_dropped(filename, state)
             self.manual_recording_flag = False
             print("[recorder] Finalizada grabación manual:", filename)
 
@@ -147,6 +218,10 @@ class RecorderManager:
         self.auto_stop_event = None
         self.manual_stop_event = None
 
+        # parar el proceso de codificación (si se usa) tras cerrar los ficheros
+        if self.encoder is not None:
+            self.encoder.stop(timeout=max(0.5, timeout - (time.time() - start)))
+
     def is_recording(self) -> bool:
         """Devuelve True si hay alguna grabación (auto o manual) en curso."""
         # hilos vivos o flags
@@ -0,0 +1,176 @@
+# soak.py
+# Prueba de larga duración: conduce DetectorGUI completo (detección, auto-grabación, evidencias)
+# con una cámara sintética a velocidad acelerada e informa de FPS, latencias, memoria, hilos y ficheros.
+# Uso:
+#   python soak.py --duration 7200 --width 1280 --height 720 --fps 20
+#   (necesita pantalla para Tk; en un servidor: xvfb-run python soak.py ...)
+import os
+import sys
+import time
+import types
+import argparse
+import tempfile
+import threading
+import traceback
+from collections import deque
+import tkinter as tk
+import cv2
+import numpy as np
+
+import config
+from gui import DetectorGUI
+from prebuffer import CompressedFrameBuffer
+from synthcam import SyntheticCapture
+from background import WarmStartSubtractor
+
+def rss_mb():
+    """Memoria residente del proceso en MB (Linux: /proc; si no, pico de ru_maxrss)."""
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def count_files(evid_dir):
+    counts = {"videos": 0, "intruso_jpg": 0, "caras": 0, "timelines": 0}
+    for f in os.listdir(evid_dir):
+        if f.endswith(".timeline.npy"):
+            counts["timelines"] += 1
+        elif f.endswith(".avi"):
+            counts["videos"] += 1
+        elif f.startswith("cara_"):
+            counts["caras"] += 1
+        elif f.startswith("intruso_"):
+            counts["intruso_jpg"] += 1
+    return counts
+
+def make_cfg(evid_dir, **overrides):
+    """Copia de config.py con la carpeta de evidencias y ajustes de la prueba."""
+    values = {k: getattr(config, k) for k in dir(config) if k.isupper()}
+    values["EVID_DIR"] = evid_dir
+    values["ZONES_FILE"] = os.path.join(evid_dir, "zonas.json")
+    values["STREAM_ENABLED"] = False
+    values["NOTIFY_WEBHOOK_URL"] = None
+    values["NOTIFY_COMMAND"] = None
+    values.update(overrides)
+    return types.SimpleNamespace(**values)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Soak test del detector con cámara sintética")
+    ap.add_argument("--duration", type=float, default=3600, help="segundos de escena (tiempo virtual)")
+    ap.add_argument("--width", type=int, default=640)
+    ap.add_argument("--height", type=int, default=480)
+    ap.add_argument("--fps", type=float, default=20, help="FPS nominales de la cámara sintética")
+    ap.add_argument("--speed", type=float, default=0, help="factor de aceleración (0 = lo más rápido posible)")
+    ap.add_argument("--analysis-width", type=int, default=None, help="ANALYSIS_WIDTH (flujo doble)")
+    ap.add_argument("--faces-dir", default=None, help="carpeta con imágenes de caras para las escenas 'face'")
+    ap.add_argument("--evid-dir", default=None, help="carpeta de evidencias (por defecto una temporal)")
+    ap.add_argument("--report", type=float, default=30, help="segundos reales entre informes")
+    ap.add_argument("--hidden", action="store_true", help="no mostrar la ventana")
+    args = ap.parse_args(argv)
+
+    evid_dir = args.evid_dir or tempfile.mkdtemp(prefix="soak_evid_")
+    os.makedirs(evid_dir, exist_ok=True)
+    overrides = {}
+    if args.analysis_width is not None:
+        overrides["ANALYSIS_WIDTH"] = args.analysis_width
+    cfg = make_cfg(evid_dir, **overrides)
+
+    cap = SyntheticCapture(args.width, args.height, fps=args.fps, faces_dir=args.faces_dir,
+                           dark_level=max(1, cfg.UMBRAL_LUZ // 2))
+    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    backSub = WarmStartSubtractor(cv2.createBackgroundSubtractorMOG2(history=500, varThreshold=16, detectShadows=True),
+                                  os.path.join(evid_dir, "fondo"), warmup_frames=cfg.BG_WARMUP_FRAMES,
+                                  snapshot_every=cfg.BG_SNAPSHOT_EVERY)
+    frame_buffer = CompressedFrameBuffer(max_bytes=cfg.PREROLL_MAX_BYTES, max_seconds=cfg.PREROLL_SECONDS,
+                                         quality=cfg.PREROLL_JPEG_QUALITY)
+    record_queue = deque()
+    lock = threading.Lock()
+
+    root = tk.Tk()
+    if args.hidden:
+        root.withdraw()
+    app = DetectorGUI(root, cap, backSub, face_cascade, cfg, frame_buffer, record_queue, lock)
+    app.alarm_enabled = False  # sin sonido durante la prueba
+
+    total_frames = int(args.duration * args.fps)
+    frame_period = 0 if args.speed <= 0 else 1.0 / (args.fps * args.speed)
+    print(f"[soak] {total_frames} frames {args.width}x{args.height} @ {args.fps} fps, evidencias en {evid_dir}")
+
+    rss0 = rss_mb()
+    threads0 = threading.active_count()
+    latencies = []
+    max_threads = threads0
+    t_start = time.perf_counter()
+    t_report = t_start
+    frames_report = 0
+
+    def report(final=False):
+        nonlocal t_report, frames_report, latencies
+        now = time.perf_counter()
+        lat = np.array(latencies) * 1000 if latencies else np.zeros(1)
+        fps = frames_report / max(1e-9, now - t_report)
+        files = count_files(evid_dir)
+        print(f"[soak] {'FINAL ' if final else ''}frame {cap.frame_idx}/{total_frames}  "
+              f"fps {fps:.1f}  lat p50 {np.percentile(lat, 50):.1f} p95 {np.percentile(lat, 95):.1f} "
+              f"p99 {np.percentile(lat, 99):.1f} max {lat.max():.1f} ms  "
+              f"rss {rss_mb():.0f} MB (+{rss_mb() - rss0:.0f})  hilos {threading.active_count()} "
+              f"(max {max_threads})  record_queue {len(record_queue)}  pre-roll {frame_buffer.nbytes // 1024} KB  "
+              f"puntos {len(app.puntos)}  ficheros {files}")
+        t_report, frames_report, latencies = now, 0, []
+
+    # el bucle va por root.after dentro de mainloop, como en main.py: los hilos de la GUI
+    # (lista de evidencias, timelapse) devuelven su resultado con root.after, que exige mainloop
+    done = 0
+    def step():
+        nonlocal done, frames_report, max_threads
+        if done >= total_frames:
+            root.quit()
+            return
+        t0 = time.perf_counter()
+        try:
+            app.loop_iteration()
+        except Exception:
+            traceback.print_exc()
+            root.quit()
+            return
+        dt = time.perf_counter() - t0
+        latencies.append(dt)
+        done += 1
+        frames_report += 1
+        max_threads = max(max_threads, threading.active_count())
+        if time.perf_counter() - t_report >= args.report:
+            report()
+        delay = frame_period - dt if frame_period else 0
+        root.after(max(0, int(delay * 1000)), step)
+
+    root.after(0, step)
+    try:
+        root.mainloop()
+    except KeyboardInterrupt:
+        print("[soak] Interrumpido")
+    report(final=True)
+    elapsed = time.perf_counter() - t_start
+    print(f"[soak] media {cap.frame_idx / max(1e-9, elapsed):.1f} fps en {elapsed:.0f} s reales "
+          f"({cap.frame_idx / args.fps:.0f} s de escena)")
+
+    # comprobar que las grabaciones terminan (hilos atascados = fallo)
+    app.recorder.stop_all_and_wait(timeout=10.0)
+    stuck = [t.name for t in (app.recorder.auto_thread, app.recorder.manual_thread) if t is not None and t.is_alive()]
+    frame_buffer.stop()
+    app.alerts.stop()
+    try:
+        root.destroy()
+    except tk.TclError:
+        pass
+    growth = rss_mb() - rss0
+    print(f"[soak] RSS +{growth:.0f} MB, hilos al final {threading.active_count()} (al inicio {threads0}), "
+          f"grabaciones atascadas: {stuck or 'ninguna'}")
+    return 1 if stuck else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
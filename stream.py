@@ -0,0 +1,232 @@
+# stream.py
+# Servidor HTTP (asyncio) opcional para ver el vídeo procesado en remoto: MJPEG + snapshot
+# Cada frame se codifica en JPEG una sola vez por resolución y se comparte entre todos los clientes.
+import time
+import asyncio
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit, parse_qs
+import cv2
+
+_INDEX_HTML = b"""<!doctype html><html><head><meta charset="utf-8"><title>Detector</title></head>
+<body style="margin:0;background:#111"><img src="/stream.mjpg" style="max-width:100%"></body></html>"""
+
+class LiveStreamServer:
+    """
+    publish(frame) solo guarda una referencia al último frame (no codifica en el hilo de la GUI).
+    El bucle asyncio (hilo propio) codifica, como mucho max_fps veces por segundo y solo para las
+    resoluciones que tengan clientes, y despierta a los clientes. Un cliente lento se queda
+    esperando en su drain() y al volver recibe el frame más reciente: pierde frames él solo.
+    Rutas:
+        /              página con el vídeo
+        /stream.mjpg   MJPEG (multipart/x-mixed-replace), ?w=<ancho>
+        /snapshot.jpg  JPEG del último frame, ?w=<ancho>
+    Uso:
+        server = LiveStreamServer("0.0.0.0", 8080, widths=(640, 320))
+        server.start(); server.publish(vis); server.stop()
+    """
+    def __init__(self, host="127.0.0.1", port=8080, quality=75, max_fps=10.0, widths=(640, 320)):
+        self.host = host
+        self.port = int(port)
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+        self.min_interval = 1.0 / max(0.1, float(max_fps))
+        # anchos permitidos (0 = resolución original): evita que un cliente fuerce codificaciones arbitrarias
+        self.widths = sorted({0, *[int(w) for w in widths]})
+
+        self._lock = threading.Lock()
+        self._frame = None
+        self._seq = 0
+
+        self._loop = None
+        self._thread = None
+        self._new_frame = None       # asyncio.Event (solo desde el bucle)
+        self._cond = None            # asyncio.Condition para despertar clientes
+        self._latest = {}            # ancho -> (seq, bytes JPEG)
+        self._clients = defaultdict(int)  # ancho -> nº de clientes MJPEG
+        self._n_clients = 0               # total (se lee desde el hilo de la GUI)
+        self._stopping = False
+        self.encodes = 0
+
+    # ---------- API (hilo de la GUI) ----------
+    def start(self):
+        if self._thread is not None:
+            return
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name="stream", daemon=True)
+        self._thread.start()
+        ready.wait(5.0)
+
+    def publish(self, frame):
+        with self._lock:
+            self._frame = frame
+            self._seq += 1
+        loop = self._loop
+        if loop is not None and self._n_clients > 0:
+            try:
+                loop.call_soon_threadsafe(self._new_frame.set)
+            except RuntimeError:
+                pass  # bucle cerrado
+
+    def stop(self, timeout=2.0):
+        loop = self._loop
+        if loop is None:
+            return
+        self._stopping = True
+        try:
+            loop.call_soon_threadsafe(self._wake_all)
+            loop.call_soon_threadsafe(loop.stop)
+        except RuntimeError:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # ---------- bucle asyncio ----------
+    def _run(self, ready):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._new_frame = asyncio.Event()
+        self._cond = asyncio.Condition()
+        try:
+            server = loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        except OSError as e:
+            print("[stream] No se pudo abrir el servidor:", e)
+            ready.set()
+            loop.close()
+            return
+        self._loop = loop
+        print(f"[stream] Vídeo en http://{self.host}:{self.port}/")
+        ready.set()
+        encoder = loop.create_task(self._encode_loop())
+        try:
+            loop.run_forever()
+        finally:
+            self._loop = None
+            encoder.cancel()
+            server.close()
+            pending = asyncio.all_tasks(loop)
+            for t in pending:
+                t.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+
+    def _wake_all(self):
+        async def _notify():
+            async with self._cond:
+                self._cond.notify_all()
+        asyncio.ensure_future(_notify())
+
+    def _encode(self, frame, width):
+        if width and frame.shape[1] > width:
+            h = int(frame.shape[0] * width / frame.shape[1])
+            frame = cv2.resize(frame, (width, h), interpolation=cv2.INTER_AREA)
+        ok, jpg = cv2.imencode('.jpg', frame, self.params)
+        self.encodes += 1
+        return jpg.tobytes() if ok else None
+
+    async def _encode_loop(self):
+        loop = asyncio.get_running_loop()
+        last = 0.0
+        while True:
+            await self._new_frame.wait()
+            self._new_frame.clear()
+            # limitar a max_fps: lo que llegue mientras tanto se resume en el frame más reciente
+            wait = self.min_interval - (time.time() - last)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            last = time.time()
+            with self._lock:
+                frame, seq = self._frame, self._seq
+            if frame is None:
+                continue
+            for width in [w for w, n in self._clients.items() if n > 0]:
+                # imencode/resize liberan el GIL: en el pool de hilos para no bloquear el bucle
+                data = await loop.run_in_executor(None, self._encode, frame, width)
+                if data is not None:
+                    self._latest[width] = (seq, data)
+            async with self._cond:
+                self._cond.notify_all()
+
+    def _pick_width(self, query):
+        try:
+            req = int(parse_qs(query).get('w', ['0'])[0])
+        except ValueError:
+            req = 0
+        if req <= 0:
+            return 0
+        # el ancho permitido más cercano
+        return min((w for w in self.widths if w), key=lambda w: abs(w - req), default=0)
+
+    # ---------- HTTP ----------
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 10.0)
+            # descartar cabeceras
+            while True:
+                line = await asyncio.wait_for(reader.readline(), 10.0)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+            parts = request.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] != "GET":
+                await self._respond(writer, 405, b"text/plain", b"Method Not Allowed")
+                return
+            url = urlsplit(parts[1])
+            width = self._pick_width(url.query)
+            if url.path in ("/", "/index.html"):
+                await self._respond(writer, 200, b"text/html; charset=utf-8", _INDEX_HTML)
+            elif url.path == "/snapshot.jpg":
+                await self._snapshot(writer, width)
+            elif url.path == "/stream.mjpg":
+                await self._stream(writer, width)
+            else:
+                await self._respond(writer, 404, b"text/plain", b"Not Found")
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # CancelledError: cierre del servidor con clientes conectados
+            pass
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    async def _respond(self, writer, status, ctype, body):
+        reason = {200: b"OK", 404: b"Not Found", 405: b"Method Not Allowed", 503: b"Service Unavailable"}[status]
+        writer.write(b"HTTP/1.0 %d %s\r\nContent-Type: %s\r\nContent-Length: %d\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n" % (status, reason, ctype, len(body)))
+        writer.write(body)
+        await writer.drain()
+
+    async def _snapshot(self, writer, width):
+        with self._lock:
+            frame, seq = self._frame, self._seq
+        if frame is None:
+            await self._respond(writer, 503, b"text/plain", b"Sin imagen todavia")
+            return
+        cached = self._latest.get(width)
+        if cached is not None and cached[0] == seq:
+            data = cached[1]  # ya codificado para los clientes MJPEG
+        else:
+            data = await asyncio.get_running_loop().run_in_executor(None, self._encode, frame, width)
+        await self._respond(writer, 200, b"image/jpeg", data or b"")
+
+    async def _stream(self, writer, width):
+        self._clients[width] += 1
+        self._n_clients += 1
+        self._new_frame.set()  # primer frame sin esperar al siguiente publish
+        try:
+            writer.write(b"HTTP/1.0 200 OK\r\nCache-Control: no-cache\r\nConnection: close\r\n"
+                         b"Content-Type: multipart/x-mixed-replace; boundary=frame\r\n\r\n")
+            last = 0
+            while not self._stopping:
+                async with self._cond:
+                    await self._cond.wait_for(
+                        lambda: self._stopping or self._latest.get(width, (0, None))[0] > last)
+                if self._stopping:
+                    break
+                last, data = self._latest[width]
+                writer.write(b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n" % len(data))
+                writer.write(data)
+                writer.write(b"\r\n")
+                await writer.drain()  # cliente lento: solo espera esta corrutina
+        finally:
+            self._clients[width] -= 1
+            self._n_clients -= 1
@@ -0,0 +1,143 @@
+# synthcam.py
+# Cámara sintética compatible con cv2.VideoCapture: escenas guionizadas (manchas en movimiento, caras,
+# cambios de luz, reposo) para pruebas de larga duración sin cámara real
+import os
+import cv2
+import numpy as np
+
+# guion por defecto: (tipo, segundos). Tipos: idle, blobs, face, dark, flicker
+DEFAULT_SCRIPT = [
+    ("idle", 30),
+    ("blobs", 10),
+    ("idle", 20),
+    ("face", 8),
+    ("dark", 15),
+    ("flicker", 5),
+    ("blobs", 5),
+]
+
+class SyntheticCapture:
+    """
+    Sustituto de cv2.VideoCapture (isOpened/read/get/set/release) que genera frames según un guion.
+    El tiempo es virtual (nº de frame / fps): se puede leer tan rápido como se quiera.
+    Las caras salen de las imágenes de faces_dir (si se indica); si no, se dibuja un óvalo.
+    Uso:
+        cap = SyntheticCapture(1280, 720, fps=20, script=DEFAULT_SCRIPT, dark_level=20)
+        ret, frame = cap.read()
+    """
+    def __init__(self, width=640, height=480, fps=20, script=None, faces_dir=None,
+                 dark_level=20, noise=4, seed=0, loop=True):
+        self.width = int(width)
+        self.height = int(height)
+        self.fps = float(fps)
+        self.script = list(script or DEFAULT_SCRIPT)
+        self.dark_level = dark_level  # brillo medio de las escenas 'dark' (por debajo de UMBRAL_LUZ)
+        self.noise = noise
+        self.loop = loop
+        self.rng = np.random.default_rng(seed)
+        self.frame_idx = 0
+        self.opened = True
+
+        # fondo fijo con textura (para que MOG2 tenga algo que aprender)
+        base = self.rng.integers(60, 180, size=(self.height // 8 + 1, self.width // 8 + 1, 3), dtype=np.uint8)
+        self.background = cv2.resize(base, (self.width, self.height), interpolation=cv2.INTER_CUBIC)
+        self.faces = self._load_faces(faces_dir)
+
+        # frames en los que empieza cada tramo del guion
+        self._bounds = np.cumsum([0] + [int(sec * self.fps) for _, sec in self.script])
+
+    def _load_faces(self, faces_dir):
+        faces = []
+        if faces_dir and os.path.isdir(faces_dir):
+            for f in sorted(os.listdir(faces_dir)):
+                if f.lower().endswith(('.jpg', '.jpeg', '.png')):
+                    img = cv2.imread(os.path.join(faces_dir, f))
+                    if img is not None:
+                        faces.append(img)
+        return faces
+
+    # ---------- interfaz VideoCapture ----------
+    def isOpened(self):
+        return self.opened
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.frame_idx)
+        return 0.0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.frame_idx = int(value)
+            return True
+        return False
+
+    def release(self):
+        self.opened = False
+
+    def read(self):
+        if not self.opened:
+            return False, None
+        total = int(self._bounds[-1])
+        idx = self.frame_idx
+        if idx >= total:
+            if not self.loop or total == 0:
+                return False, None
+            idx %= total
+        seg = int(np.searchsorted(self._bounds, idx, side='right')) - 1
+        kind = self.script[seg][0]
+        local = idx - int(self._bounds[seg])  # frame dentro del tramo
+        frame = self._render(kind, local)
+        self.frame_idx += 1
+        return True, frame
+
+    # ---------- escenas ----------
+    def scene_at(self, idx=None):
+        """Tipo de escena del frame idx (por defecto el último leído), para comparar con lo detectado."""
+        idx = (self.frame_idx - 1 if idx is None else idx) % max(1, int(self._bounds[-1]))
+        seg = int(np.searchsorted(self._bounds, idx, side='right')) - 1
+        return self.script[seg][0]
+
+    def _render(self, kind, local):
+        frame = self.background.copy()
+        t = local / self.fps
+        if kind == "blobs":
+            # dos manchas que cruzan la imagen a distinta velocidad
+            for i, speed in enumerate((0.25, 0.4)):
+                x = int(((t * speed + i * 0.5) % 1.0) * self.width)
+                y = int(self.height * (0.35 + 0.3 * i))
+                r = max(20, self.height // 8)
+                cv2.circle(frame, (x, y), r, (30 + 90 * i, 40, 200 - 80 * i), -1)
+        elif kind == "face":
+            self._draw_face(frame, t)
+        elif kind == "dark":
+            frame = (frame.astype(np.float32) * (self.dark_level / 128.0)).astype(np.uint8)
+        elif kind == "flicker":
+            gain = 0.6 + 0.4 * abs(np.sin(t * 6.0))
+            frame = np.clip(frame.astype(np.float32) * gain, 0, 255).astype(np.uint8)
+        if self.noise:
+            n = self.rng.integers(-self.noise, self.noise + 1, size=frame.shape, dtype=np.int16)
+            frame = np.clip(frame.astype(np.int16) + n, 0, 255).astype(np.uint8)
+        return frame
+
+    def _draw_face(self, frame, t):
+        size = max(80, self.height // 3)
+        x = int(self.width * 0.3 + np.sin(t) * self.width * 0.1)
+        y = int(self.height * 0.3)
+        x = min(max(0, x), self.width - size)
+        y = min(max(0, y), self.height - size)
+        if self.faces:
+            face = self.faces[int(t) % len(self.faces)]
+            frame[y:y+size, x:x+size] = cv2.resize(face, (size, size))
+        else:
+            # sin imágenes: óvalo con ojos y boca (no siempre lo detecta Haar, pero genera movimiento)
+            c = (x + size // 2, y + size // 2)
+            cv2.ellipse(frame, c, (size // 3, size // 2 - 4), 0, 0, 360, (150, 180, 220), -1)
+            cv2.circle(frame, (c[0] - size // 8, c[1] - size // 8), size // 20, (40, 30, 30), -1)
+            cv2.circle(frame, (c[0] + size // 8, c[1] - size // 8), size // 20, (40, 30, 30), -1)
+            cv2.ellipse(frame, (c[0], c[1] + size // 6), (size // 8, size // 20), 0, 0, 180, (60, 40, 120), 3)
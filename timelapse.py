@@ -0,0 +1,93 @@
+# timelapse.py
+# Compila las fotos intruso_*.jpg de un día en un único vídeo (timelapse).
+# Las imágenes se decodifican en paralelo (cv2.imread libera el GIL) y se escriben en orden en un solo writer.
+# Uso:
+#   python timelapse.py                 # hoy
+#   python timelapse.py --date 18102026 --fps 10 --workers 4
+import os
+import re
+import sys
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+
+import config as cfg
+
+def day_stills(evid_dir, date):
+    """Fotos intruso_<date>_HHMMSS.jpg del día, en orden cronológico (sin las de grabación manual)."""
+    pat = re.compile(rf"^intruso_{date}_(\d{{6}})\.jpg$", re.IGNORECASE)
+    files = [f for f in os.listdir(evid_dir) if pat.match(f)]
+    return [os.path.join(evid_dir, f) for f in sorted(files)]
+
+def build_timelapse(evid_dir, date=None, fps=10, workers=4, out_path=None, codec=None, progress=None):
+    """Crea el timelapse del día `date` (DDMMYYYY, por defecto hoy). Devuelve la ruta o None si no hay fotos.
+    Lanza RuntimeError si no se puede abrir el writer (codec no disponible) o no se escribe nada.
+    Se decodifican como mucho workers*4 imágenes por delante del writer para acotar la memoria."""
+    date = date or time.strftime("%d%m%Y")
+    paths = day_stills(evid_dir, date)
+    if not paths:
+        return None
+    out_path = out_path or os.path.join(evid_dir, f"timelapse_{date}.avi")
+    codec = codec or cfg.RECORD_CODEC
+
+    writer = None
+    size = None
+    written = 0
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = deque()
+        it = iter(paths)
+        # ventana deslizante de lecturas en curso, consumidas en orden
+        for p in it:
+            pending.append(pool.submit(cv2.imread, p))
+            if len(pending) >= workers * 4:
+                break
+        while pending:
+            img = pending.popleft().result()
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.append(pool.submit(cv2.imread, nxt))
+            if img is None:
+                continue
+            if writer is None:
+                size = (img.shape[1], img.shape[0])
+                writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*codec), max(1, int(fps)), size)
+                if not writer.isOpened():
+                    raise RuntimeError(f"No se pudo abrir el vídeo {out_path} con el codec {codec}")
+            elif (img.shape[1], img.shape[0]) != size:
+                img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+            writer.write(img)
+            written += 1
+            if progress and written % 100 == 0:
+                progress(written, len(paths))
+    if writer is None:
+        # había fotos pero ninguna se pudo leer
+        raise RuntimeError(f"No se pudo leer ninguna de las {len(paths)} fotos del {date}")
+    writer.release()
+    if not os.path.exists(out_path) or os.path.getsize(out_path) == 0:
+        raise RuntimeError(f"El vídeo {out_path} quedó vacío")
+    print(f"[timelapse] {out_path}: {written} fotos en {time.perf_counter() - t0:.1f} s")
+    return out_path
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Timelapse diario de las fotos de intrusos")
+    ap.add_argument("--date", default=None, help="día DDMMYYYY (por defecto hoy)")
+    ap.add_argument("--fps", type=int, default=10)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    ap.add_argument("--out", default=None, help="ruta del vídeo (por defecto Evidencias/timelapse_<día>.avi)")
+    args = ap.parse_args(argv)
+    try:
+        path = build_timelapse(cfg.EVID_DIR, args.date, fps=args.fps, workers=args.workers, out_path=args.out,
+                               progress=lambda n, total: print(f"[timelapse] {n}/{total}"))
+    except (RuntimeError, OSError) as e:
+        print("[timelapse] Error:", e)
+        return 2
+    if path is None:
+        print("[timelapse] No hay fotos para ese día")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# timeline.py
+# Línea temporal de actividad por frame guardada junto a cada grabación (sidecar .timeline.npy)
+import os
+import numpy as np
+
+# un registro por frame escrito: área en movimiento (px), caras detectadas y flag de movimiento confirmado
+TIMELINE_DTYPE = np.dtype([('area', '<u4'), ('faces', 'u1'), ('mov', 'u1')])
+
+def timeline_path(video_path):
+    """intruso_X.avi -> intruso_X.timeline.npy"""
+    return os.path.splitext(video_path)[0] + ".timeline.npy"
+
+class TimelineWriter:
+    """Acumula (area, faces, mov) por frame mientras se graba, en un array estructurado que crece
+    por duplicación (6 bytes por fila), y lo vuelca al sidecar cada `flush_every` filas y al cerrar:
+    si la aplicación cae en mitad de una grabación manual larga queda la línea temporal hasta el último volcado."""
+    def __init__(self, video_path, flush_every=600):
+        self.path = timeline_path(video_path)
+        self.flush_every = int(flush_every)
+        self._rows = np.empty(1024, dtype=TIMELINE_DTYPE)
+        self._n = 0
+        self._flushed = 0
+
+    def __len__(self):
+        return self._n
+
+    def append(self, meta):
+        # meta = (area, faces, mov) o None si el frame no trae información (se guarda como inactivo)
+        if self._n == len(self._rows):
+            grown = np.empty(2 * len(self._rows), dtype=TIMELINE_DTYPE)
+            grown[:self._n] = self._rows
+            self._rows = grown
+        if meta is None:
+            self._rows[self._n] = (0, 0, 0)
+        else:
+            area, faces, mov = meta
+            self._rows[self._n] = (min(int(area), 0xFFFFFFFF), min(int(faces), 255), 1 if mov else 0)
+        self._n += 1
+        if self.flush_every > 0 and self._n - self._flushed >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Escribe las filas acumuladas (fichero temporal + rename: nunca queda un sidecar a medias)."""
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "wb") as fh:
+                np.save(fh, self._rows[:self._n])
+            os.replace(tmp, self.path)
+            self._flushed = self._n
+        except Exception as e:
+            print("[timeline] Error guardando línea temporal:", e)
+
+    def close(self):
+        self.flush()
+
+    def discard(self):
+        """Borra el sidecar (volcados periódicos incluidos): el vídeo no llegó a crearse."""
+        for path in (self.path, self.path + ".tmp"):
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError as e:
+                print("[timeline] Error borrando línea temporal:", e)
+
+def load_timeline(video_path):
+    """Devuelve el array estructurado del sidecar o None si no existe."""
+    path = timeline_path(video_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        tl = np.load(path)
+        return tl if tl.dtype == TIMELINE_DTYPE else None
+    except Exception as e:
+        print("[timeline] Error leyendo línea temporal:", e)
+        return None
+
+def event_starts(tl):
+    """Índices de frame donde empieza cada tramo de actividad (movimiento confirmado o caras)."""
+    active = (tl['mov'] > 0) | (tl['faces'] > 0)
+    prev = np.concatenate(([False], active[:-1]))
+    return np.flatnonzero(active & ~prev)
+
+def activity_columns(tl, width):
+    """Reduce la línea temporal a `width` columnas: (área máxima normalizada 0..1, mov, caras) por columna."""
+    n = len(tl)
+    if n == 0 or width <= 0:
+        return np.zeros(0), np.zeros(0, bool), np.zeros(0, bool)
+    edges = np.linspace(0, n, width + 1).astype(np.int64)[:-1]
+    edges = np.minimum(edges, n - 1)
+    area = np.maximum.reduceat(tl['area'].astype(np.float32), edges)
+    mov = np.maximum.reduceat(tl['mov'], edges) > 0
+    faces = np.maximum.reduceat(tl['faces'], edges) > 0
+    peak = float(area.max())
+    return (area / peak if peak > 0 else area), mov, faces
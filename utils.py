@@ -2,30 +2,73 @@
 # Funciones utilitarias (sonido, timestamp, listado de evidencias) no bloqueantes
 import time
 import threading
-import pygame
 import os
 
-# Inicializar mixer globalmente cuando se importe utils
-try:
-    pygame.mixer.init()
-except Exception:
-    # Si falla, algunas funciones de sonido no estarán disponibles, pero el resto sigue.
-    pass
+# El mixer de pygame se inicializa bajo demanda (o en segundo plano con init_audio_async)
+# para no retrasar la aparición de la ventana al arrancar.
+_mixer_ready = None  # None = sin intentar, True/False = resultado de la inicialización
+_mixer_lock = threading.Lock()
 
-def play_sound_nonblocking(path):
-    """Reproduce un WAV (no bloqueante). No lanza excepción si falla."""
-    def _play(p):
+def init_audio():
+    """Importa pygame e inicializa el mixer una sola vez. Devuelve True si hay audio."""
+    global _mixer_ready
+    with _mixer_lock:
+        if _mixer_ready is None:
+            try:
+                import pygame
+                pygame.mixer.init()
+                _mixer_ready = True
+            except Exception as e:
+                # Si falla, algunas funciones de sonido no estarán disponibles, pero el resto sigue.
+                print("[utils.init_audio] Sin audio:", e)
+                _mixer_ready = False
+    return _mixer_ready
+
+def init_audio_async(on_done=None):
+    """Inicializa el audio en un hilo aparte; on_done() se llama al terminar."""
+    def _init():
+        init_audio()
+        if on_done:
+            on_done()
+    threading.Thread(target=_init, daemon=True).start()
+
+def stop_audio():
+    """Detiene cualquier sonido (solo si el mixer llegó a inicializarse)."""
+    if _mixer_ready:
         try:
-            pygame.mixer.music.load(p)
-            pygame.mixer.music.play()
-        except Exception as e:
-            print("[utils.play_sound] Error:", e)
-    if os.path.exists(path):
-        threading.Thread(target=_play, args=(path,), daemon=True).start()
-    else:
-        # archivo no existe: no hacer nada (evita crash)
-        # print("[utils.play_sound] fichero no encontrado:", path)
-        pass
+            import pygame
+            pygame.mixer.stop()
+        except Exception:
+            pass
+
+_sounds = {}  # ruta -> pygame.mixer.Sound ya decodificado
+
+def load_sound(path):
+    """Decodifica un WAV una sola vez y lo guarda en caché. Devuelve None si no hay audio."""
+    snd = _sounds.get(path)
+    if snd is not None:
+        return snd
+    if not os.path.exists(path) or not init_audio():
+        return None
+    try:
+        import pygame
+        snd = pygame.mixer.Sound(path)
+        _sounds[path] = snd
+        return snd
+    except Exception as e:
+        print("[utils.load_sound] Error:", e)
+        return None
+
+def play_sound_nonblocking(path):
+    """Reproduce un WAV (no bloqueante, Sound.play no espera). No lanza excepción si falla."""
+    snd = load_sound(path)
+    if snd is None:
+        # archivo no existe o sin audio: no hacer nada (evita crash)
+        return
+    try:
+        snd.play()
+    except Exception as e:
+        print("[utils.play_sound] Error:", e)
 
 def timestamp():
     return time.strftime("%d%m%Y_%H%M%S")
@@ -35,3 +78,32 @@ def list_evid_files(evid_dir):
     files = [f for f in os.listdir(evid_dir) if f.lower().endswith(exts)]
     files = sorted(files, reverse=True)
     return files
+
+class StartupTimer:
+    """Desglose de tiempos de arranque. mark() anota una etapa; report() imprime las anotadas
+    hasta ese momento y las que lleguen después (tareas en segundo plano) se imprimen al vuelo."""
+    def __init__(self, t0=None):
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self.marks = []
+        self.reported = False
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        t = time.perf_counter() - self.t0
+        with self._lock:
+            self.marks.append((name, t))
+            late = self.reported
+        if late:
+            print(f"[startup] {name}: {t*1000:.0f} ms (segundo plano)")
+
+    def report(self):
+        with self._lock:
+            if self.reported:
+                return
+            self.reported = True
+            marks = list(self.marks)
+        print("[startup] Desglose de arranque:")
+        prev = 0.0
+        for name, t in marks:
+            print(f"[startup]   {name:<22} {t*1000:7.0f} ms  (+{(t-prev)*1000:.0f} ms)")
+            prev = t
@@ -0,0 +1,159 @@
+# zones.py
+# Zonas de detección poligonales (inclusión/exclusión) por cámara, con máscara y recorte precalculados
+import json
+import os
+import cv2
+import numpy as np
+
+class ZoneManager:
+    """
+    Polígonos de inclusión/exclusión guardados por cámara en un JSON, junto con el tamaño del frame
+    sobre el que se dibujaron: si cambia la resolución (CAMERA_WIDTH/HEIGHT, ANALYSIS_WIDTH) se reescalan.
+    Precalcula el rectángulo (bounding box) de la zona útil y la máscara recortada a él,
+    para que el análisis solo procese esa parte del frame.
+    Uso:
+        zones = ZoneManager(cfg.ZONES_FILE, cfg.CAMERA_INDEX)
+        roi, roi_mask = zones.get_roi(frame.shape)
+    """
+    def __init__(self, path, cam_id=0):
+        self.path = path
+        self.cam_id = str(cam_id)
+        self.include = []   # lista de polígonos [(x, y), ...]
+        self.exclude = []
+        self.size = None    # (w, h) del frame de los polígonos; None = zonas antiguas sin tamaño (no se reescalan)
+
+        # caché de máscara (se recalcula si cambian zonas o tamaño de frame)
+        self._cache_shape = None
+        self._roi = None
+        self._roi_mask = None
+        self.load()
+
+    # ---------- persistencia ----------
+    def _read_all(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            return data if isinstance(data, dict) else {}
+        except Exception as e:
+            print("[zones] Error leyendo zonas:", e)
+            return {}
+
+    def load(self):
+        cam = self._read_all().get(self.cam_id, {})
+        self.include = [[tuple(p) for p in poly] for poly in cam.get("include", [])]
+        self.exclude = [[tuple(p) for p in poly] for poly in cam.get("exclude", [])]
+        size = cam.get("size")
+        self.size = (int(size[0]), int(size[1])) if size else None
+        self._invalidate()
+
+    def save(self):
+        """Guarda las zonas de esta cámara sin tocar las de las demás."""
+        data = self._read_all()
+        data[self.cam_id] = {
+            "include": [[list(p) for p in poly] for poly in self.include],
+            "exclude": [[list(p) for p in poly] for poly in self.exclude],
+            "size": list(self.size) if self.size else None,
+        }
+        try:
+            with open(self.path, "w", encoding="utf-8") as fh:
+                json.dump(data, fh, indent=2)
+        except Exception as e:
+            print("[zones] Error guardando zonas:", e)
+
+    # ---------- edición ----------
+    def add_polygon(self, pts, kind="include", frame_shape=None):
+        """Añade un polígono (mínimo 3 puntos) en coordenadas de un frame de tamaño frame_shape.
+        kind: 'include' o 'exclude'."""
+        if len(pts) < 3:
+            return False
+        if frame_shape is not None:
+            h, w = frame_shape[:2]
+            # las zonas existentes pasan al tamaño actual para guardarlas todas en la misma escala
+            self.include = self._scaled(self.include, w, h)
+            self.exclude = self._scaled(self.exclude, w, h)
+            self.size = (w, h)
+        poly = [(int(x), int(y)) for (x, y) in pts]
+        if kind == "exclude":
+            self.exclude.append(poly)
+        else:
+            self.include.append(poly)
+        self._invalidate()
+        return True
+
+    def clear(self):
+        self.include = []
+        self.exclude = []
+        self.size = None
+        self._invalidate()
+
+    def has_zones(self):
+        return bool(self.include or self.exclude)
+
+    def _invalidate(self):
+        self._cache_shape = None
+        self._roi = None
+        self._roi_mask = None
+
+    def _scaled(self, polys, w, h):
+        """Polígonos llevados de self.size a un frame de w x h."""
+        if self.size is None or self.size == (w, h):
+            return polys
+        sx, sy = w / self.size[0], h / self.size[1]
+        return [[(int(round(x * sx)), int(round(y * sy))) for (x, y) in poly] for poly in polys]
+
+    # ---------- máscara / recorte ----------
+    def get_roi(self, frame_shape):
+        """Devuelve (roi, roi_mask).
+        roi = (x, y, w, h) en coordenadas del frame, o None si no hay zonas (analizar todo).
+        roi_mask = máscara uint8 del tamaño del recorte, o None si todo el recorte es válido.
+        Si todo queda excluido devuelve roi con w = h = 0.
+        """
+        if not self.has_zones():
+            return None, None
+        h, w = frame_shape[:2]
+        if self._cache_shape == (h, w):
+            return self._roi, self._roi_mask
+
+        include = self._scaled(self.include, w, h)
+        exclude = self._scaled(self.exclude, w, h)
+        mask = np.zeros((h, w), dtype=np.uint8)
+        if include:
+            cv2.fillPoly(mask, [np.array(p, dtype=np.int32) for p in include], 255)
+        else:
+            # solo exclusiones -> se parte del frame completo
+            mask[:] = 255
+        if exclude:
+            cv2.fillPoly(mask, [np.array(p, dtype=np.int32) for p in exclude], 0)
+
+        pts = cv2.findNonZero(mask)
+        if pts is None:
+            # sin aviso, movimiento y caras dejarían de detectarse sin que se note
+            print(f"[zones] La zona útil de la cámara {self.cam_id} queda vacía en un frame de {w}x{h}: "
+                  f"no se analiza nada (revisar o borrar las zonas)")
+            roi, roi_mask = (0, 0, 0, 0), None
+        else:
+            x, y, rw, rh = cv2.boundingRect(pts)
+            roi = (x, y, rw, rh)
+            roi_mask = np.ascontiguousarray(mask[y:y+rh, x:x+rw])
+            if cv2.countNonZero(roi_mask) == rw * rh:
+                roi_mask = None  # recorte rectangular completo: no hace falta aplicar máscara
+
+        self._cache_shape = (h, w)
+        self._roi, self._roi_mask = roi, roi_mask
+        return roi, roi_mask
+
+    def draw(self, img, pending=None, pending_kind="include"):
+        """Dibuja las zonas (amarillo = inclusión, rojo = exclusión) y el polígono en edición."""
+        h, w = img.shape[:2]
+        for poly in self._scaled(self.include, w, h):
+            cv2.polylines(img, [np.array(poly, dtype=np.int32)], True, (0, 255, 255), 1)
+        for poly in self._scaled(self.exclude, w, h):
+            cv2.polylines(img, [np.array(poly, dtype=np.int32)], True, (0, 0, 255), 1)
+        if pending:
+            color = (0, 0, 255) if pending_kind == "exclude" else (0, 255, 255)
+            cv2.polylines(img, [np.array(pending, dtype=np.int32)], False, color, 2)
+            for p in pending:
+                cv2.circle(img, p, 3, color, -1)
+        return img